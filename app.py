@@ -16,10 +16,15 @@ st.set_page_config(page_title="Olist E-Commerce Explorer (All-in-One)", layout="
 
 st.title("🏠 Olist E-Commerce Explorer")
 st.caption("Kaggle → SQLite → Streamlit")
-st.write("좌측 메뉴에서 **Reviews** 또는 **RFM Segments**를 선택하세요.")
+st.write("좌측 메뉴에서 **Reviews**, **RFM Segments**, **Cohort Retention**, **Lead Time**, **Seller Leaderboard** 중 하나를 선택하세요.")
 
 from sqlalchemy import create_engine, text
 from kaggle.api.kaggle_api_extended import KaggleApi
+from scripts.etl import build_review_fts, build_aggregates
+from viz.charts import timeseries
+from db.models import compact_frame, prune_partitions, resolve_engine, run_duckdb, get_years_from, get_states, get_category_labels
+from db.queries import dashboard_where, kpi_sql, cats_sql, trend_sql, top_sql
+from db.warmup import log_filters, start_prewarm
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 0) 기본 설정
@@ -128,6 +133,7 @@ def create_indexes():
         "olist_order_payments_dataset",
         "olist_customers_dataset",
         "olist_products_dataset",
+        "olist_order_reviews_dataset",
     ]
     missing = [t for t in required if not _table_exists(con, t)]
     if missing:
@@ -149,6 +155,8 @@ def create_indexes():
             ON olist_order_payments_dataset(order_id);
         CREATE INDEX IF NOT EXISTS idx_cust_id_state
             ON olist_customers_dataset(customer_id, customer_state);
+        CREATE INDEX IF NOT EXISTS idx_reviews_score_date
+            ON olist_order_reviews_dataset(review_score, review_creation_date DESC);
         ANALYZE;
         """
     )
@@ -226,6 +234,10 @@ if not DB_PATH.exists():
             create_indexes()
             st.write("4) 분석용 뷰 생성…")
             create_views()
+            st.write("5) 리뷰 전문검색 인덱스 생성…")
+            build_review_fts()
+            st.write("6) 사전 집계 테이블 생성…")
+            build_aggregates()
             s.update(label="✅ 데이터베이스 생성 완료. 상단 Rerun 버튼으로 다시 실행하세요.", state="complete")
         except Exception as e:
             s.update(label="❌ DB 생성 실패", state="error")
@@ -240,30 +252,34 @@ def get_engine():
     return create_engine(f"sqlite:///{DB_PATH}", future=True)
 
 @st.cache_data(ttl=3600, show_spinner=False)
-def q(sql: str, params: dict | None = None) -> pd.DataFrame:
+def q(sql: str, params: dict | None = None, years: tuple[str, str] | None = None,
+      engine: str = "sqlite", compact: bool = False) -> pd.DataFrame:
+    # engine="analytics": 무거운 GROUP BY 집계 → OLIST_ANALYTICS_ENGINE(duckdb)로 라우팅, 실패 시 SQLite
+    # compact=True: 표시·다운로드 전용 큰 결과만 문자열 → category 압축
+    if resolve_engine(engine, sql) == "duckdb":
+        try:
+            return compact_frame(run_duckdb(sql, params), categories=compact)
+        except Exception:
+            pass
+    if years:
+        sql = prune_partitions(sql, *years)
     eng = get_engine()
     with eng.begin() as conn:
-        return pd.read_sql(text(sql), conn, params=params or {})
+        return compact_frame(pd.read_sql(text(sql), conn, params=params or {}), categories=compact)
+
+# 결과 캐시 예열: 기본·인기 필터 조합을 백그라운드로 미리 조회(DB 파일이 바뀔 때마다 1회)
+start_prewarm(str(DB_PATH.stat().st_mtime_ns), q)
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 5) 사이드바 필터
 # ─────────────────────────────────────────────────────────────────────────────
 st.sidebar.header("🔧 글로벌 필터")
-years_df = q("""
-    SELECT DISTINCT strftime('%Y', order_purchase_timestamp) AS y
-    FROM olist_orders_dataset
-    WHERE order_purchase_timestamp IS NOT NULL
-    ORDER BY 1
-""")
-years = years_df["y"].dropna().tolist() or ["2016", "2017", "2018"]
-
-states_df = q("""
-    SELECT DISTINCT customer_state AS st
-    FROM olist_customers_dataset
-    WHERE customer_state IS NOT NULL
-    ORDER BY 1
-""")
-all_states = states_df["st"].dropna().tolist()
+# 옵션 목록은 ETL 메타데이터(dim_metadata) 한 테이블에서 조회(원본 DISTINCT 스캔 없음)
+years = get_years_from("olist_orders_dataset", "order_purchase_timestamp")
+if not years:
+    st.info("주문 데이터가 없습니다. `python scripts/etl.py --load` 실행 후 새로고침하세요.")
+    st.stop()
+all_states = get_states("customer_state")
 
 with st.sidebar.form("filters", clear_on_submit=False):
     y_from, y_to = st.select_slider("구매 연도 범위", options=years, value=(years[0], years[-1]))
@@ -283,18 +299,9 @@ if "applied" not in st.session_state:
     st.session_state.applied = True
     apply = True if not apply else apply
 
-base_where = ["o.order_purchase_timestamp IS NOT NULL",
-              "strftime('%Y', o.order_purchase_timestamp) BETWEEN :yf AND :yt"]
 params = {"yf": y_from, "yt": y_to}
-if pick_states:
-    states_str = ",".join(f"'{s}'" for s in pick_states)
-    base_where.append(f"""
-        o.customer_id IN (
-            SELECT customer_id FROM olist_customers_dataset
-            WHERE customer_state IN ({states_str})
-        )
-    """)
-where_sql = "WHERE " + " AND ".join(base_where)
+where_sql = dashboard_where(pick_states)
+log_filters("dashboard", {"years": [y_from, y_to], "states": pick_states, "topn": topn})
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 6) 메인 화면
@@ -304,46 +311,20 @@ st.caption("Kaggle → SQLite → Streamlit | 최초 실행 자동 ETL · 캐시
 
 # KPI
 if "KPI" in show_sections:
-    kpi_sql = f"""
-    SELECT
-      (SELECT count(*) FROM olist_orders_dataset o {where_sql}) AS orders_cnt,
-      (SELECT sum(p.payment_value)
-         FROM olist_order_payments_dataset p
-         JOIN olist_orders_dataset o USING(order_id) {where_sql}) AS pay_sum,
-      (SELECT avg(cnt) FROM (
-          SELECT count(*) AS cnt
-          FROM olist_order_items_dataset i
-          JOIN olist_orders_dataset o USING(order_id) {where_sql}
-          GROUP BY o.order_id
-      )) AS avg_items
-    """
-    k = q(kpi_sql, params=params).iloc[0]
+    k = q(kpi_sql(where_sql), params=params, years=(y_from, y_to), engine="analytics").iloc[0]
     c1, c2, c3, c4 = st.columns(4)
     with c1: st.metric("주문 수", f"{int(k['orders_cnt'] or 0):,}")
     with c2: st.metric("총 결제액(원화 환산 아님)", f"{float(k['pay_sum'] or 0):,.2f}")
     with c3: st.metric("주문당 아이템 수(평균)", f"{float(k['avg_items'] or 0):.2f}")
     with c4:
-        cats_sql = f"""
-        SELECT count(DISTINCT p.product_category_name) AS cats
-        FROM olist_order_items_dataset i
-        JOIN olist_orders_dataset o USING(order_id)
-        JOIN olist_products_dataset p USING(product_id)
-        {where_sql}
-        """
-        cats = int(q(cats_sql, params=params).iloc[0]["cats"] or 0)
+        cats = int(q(cats_sql(where_sql), params=params, years=(y_from, y_to), engine="analytics").iloc[0]["cats"] or 0)
         st.metric("카테고리 수(판매기록)", f"{cats:,}")
 
 # 월별 추이
 if "월별 추이" in show_sections:
-    trend_sql = f"""
-    SELECT strftime('%Y-%m', o.order_purchase_timestamp) AS ym, count(*) AS orders
-    FROM olist_orders_dataset o
-    {where_sql}
-    GROUP BY 1 ORDER BY 1
-    """
-    trend = q(trend_sql, params=params)
+    trend = q(trend_sql(where_sql), params=params, years=(y_from, y_to))
     st.subheader("📈 월별 주문 추이")
-    fig = px.line(trend, x="ym", y="orders") if chart_type == "line" else px.bar(trend, x="ym", y="orders")
+    fig = timeseries(trend, "ym", "orders", kind=chart_type)
     if logscale:
         fig.update_yaxes(type="log")
     st.plotly_chart(fig, use_container_width=True)
@@ -351,19 +332,10 @@ if "월별 추이" in show_sections:
 
 # Top 카테고리
 if "Top 카테고리" in show_sections:
-    top_sql = f"""
-    SELECT p.product_category_name AS category, count(*) AS cnt
-    FROM olist_order_items_dataset i
-    JOIN olist_orders_dataset o USING(order_id)
-    JOIN olist_products_dataset p USING(product_id)
-    {where_sql}
-    GROUP BY 1
-    ORDER BY 2 DESC
-    LIMIT {int(topn)}
-    """
-    top_df = q(top_sql, params=params)
+    top_df = q(top_sql(where_sql, topn), params=params, years=(y_from, y_to), engine="analytics")
+    top_df["category_en"] = top_df["category"].astype(str).map(get_category_labels())
     st.subheader(f"🏷️ Top {topn} 상품 카테고리(판매건수)")
-    fig2 = px.bar(top_df, x="category", y="cnt")
+    fig2 = px.bar(top_df, x="category", y="cnt", hover_data=["category_en"])
     if logscale:
         fig2.update_yaxes(type="log")
     st.plotly_chart(fig2, use_container_width=True)
@@ -380,7 +352,7 @@ if "원시데이터 미리보기" in show_sections:
     {where_sql}
     ORDER BY o.order_purchase_timestamp
     """
-    raw = q(raw_sql, params=params)
+    raw = q(raw_sql, params=params, years=(y_from, y_to), compact=True)
     view = raw
     if sample_rows and sample_rows > 0 and len(raw) > sample_rows:
         view = raw.sample(sample_rows, random_state=42).sort_values("order_purchase_timestamp")
@@ -428,12 +400,15 @@ if "커스텀 SQL" in show_sections:
 
     if run:
         try:
-            df = q(sql)
+            df = q(sql, compact=True)
             df_view = df
             if sample_rows and sample_rows > 0 and len(df) > sample_rows:
                 df_view = df.sample(sample_rows, random_state=42)
                 st.caption(f"※ 전체 {len(df):,}행 중 {sample_rows:,}행 샘플 표시")
             st.dataframe(df_view, use_container_width=True, height=420)
+            mem = df.attrs.get("mem_bytes")
+            if mem:
+                st.caption(f"캐시 메모리: {mem['before']/1024:,.1f} KB → {mem['after']/1024:,.1f} KB (압축 후)")
             st.download_button("결과 CSV 다운로드", df.to_csv(index=False).encode("utf-8"), file_name=csv_name)
         except Exception as e:
             st.error(str(e))
@@ -1,6 +1,8 @@
 # db/models.py
 from __future__ import annotations
 from pathlib import Path
+import os
+import re
 import pandas as pd
 import sqlite3
 from sqlalchemy import create_engine, text
@@ -12,6 +14,20 @@ DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH = DATA_DIR / "olist.sqlite"
 
+# 캐시 결과 압축 옵션(q(..., compact=True)일 때만): 고유값 비율이 이 값 이하인 문자열 컬럼은 category로 변환
+CATEGORY_MAX_RATIO = 0.5
+# OLIST_ARROW_STRINGS=1 이면 나머지 문자열 컬럼(32자 ID 등)을 Arrow 기반 string으로 저장
+ARROW_STRINGS = os.getenv("OLIST_ARROW_STRINGS", "0") == "1"
+
+# ETL(build_year_partitions, OLIST_YEAR_PARTITIONS=1)이 <table>_yYYYY로 나눠 두는 팩트 테이블.
+# items/payments는 주문 구매 연도 기준이라 o.order_purchase_timestamp 연도 필터 + 주문 조인 쿼리에만 적용
+PARTITIONED_TABLES = (
+    "olist_orders_dataset",
+    "olist_order_items_dataset",
+    "olist_order_payments_dataset",
+    "olist_order_reviews_dataset",
+)
+
 @st.cache_resource
 def get_engine():
     # DB가 아직 없으면 연결은 되지만 테이블이 없을 수 있음 → q()에서 체크
@@ -30,9 +46,218 @@ def _table_exists(table: str) -> bool:
     except Exception:
         return False
 
+def compact_frame(df: pd.DataFrame, categories: bool = False, arrow_strings: bool | None = None) -> pd.DataFrame:
+    """st.cache_data에 저장되는 결과를 작게: 정수 → int32,
+    categories=True면 저카디널리티 문자열 → category, (옵션) 나머지 문자열 → string[pyarrow].
+    category는 map/산술·groupby 동작이 달라지므로 표시·다운로드 위주의 큰 결과에서만 호출 측이 켬.
+    실수는 정밀도 손실을 피하려고 그대로 둠. 절감량은 df.attrs["mem_bytes"]에 기록."""
+    if df.empty:
+        return df
+    arrow_strings = ARROW_STRINGS if arrow_strings is None else arrow_strings
+    before = int(df.memory_usage(deep=True).sum())
+    out = df.copy()
+    for col in out.columns:
+        s = out[col]
+        if pd.api.types.is_integer_dtype(s) and not isinstance(s.dtype, pd.CategoricalDtype):
+            # int8/int16은 페이지 측 산술(예: 가중치 곱)에서 조용히 overflow 나므로 int32까지만
+            if s.dtype.itemsize > 4 and s.between(-2**31, 2**31 - 1).all():
+                out[col] = s.astype("int32")
+        elif s.dtype == object or isinstance(s.dtype, pd.StringDtype):
+            if categories and len(s) >= 50 and s.nunique(dropna=True) <= len(s) * CATEGORY_MAX_RATIO:
+                out[col] = s.astype("category")
+            elif arrow_strings and s.dtype != "string[pyarrow]":
+                try:
+                    out[col] = s.astype("string[pyarrow]")
+                except (ImportError, TypeError, ValueError):
+                    pass
+    after = int(out.memory_usage(deep=True).sum())
+    out.attrs["mem_bytes"] = {"before": before, "after": after}
+    return out
+
+def data_version() -> str:
+    """ETL이 etl_state(data_version)에 남긴 데이터 버전(DB를 바꾼 ETL 실행마다 갱신). 없으면 ''."""
+    if not DB_PATH.exists():
+        return ""
+    try:
+        with sqlite3.connect(DB_PATH) as con:
+            row = con.execute("SELECT value FROM etl_state WHERE key = 'data_version'").fetchone()
+    except Exception:
+        return ""
+    return row[0] if row else ""
+
 @st.cache_data(ttl=900)
-def q(sql: str, params: dict | None = None) -> pd.DataFrame:
-    """읽기 전용 쿼리. 테이블 없으면 빈 DF 반환(페이지에서 안내)."""
+def partition_years(table: str, version: str = "") -> list[str]:
+    """table의 연도 파티션 목록(없으면 빈 리스트 → 원본 테이블 사용).
+    version(data_version)이 캐시 키 → ETL이 파티션을 만들거나 지우면 새로 조회."""
+    if not DB_PATH.exists():
+        return []
+    try:
+        with sqlite3.connect(DB_PATH) as con:
+            rows = con.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name GLOB ?",
+                (f"{table}_y[0-9][0-9][0-9][0-9]",),
+            ).fetchall()
+    except Exception:
+        return []
+    return sorted(name[len(table) + 2:] for (name,) in rows)
+
+def prune_partitions(sql: str, yf: str, yt: str) -> str:
+    """연도 필터(yf~yt) 쿼리의 팩트 테이블 참조를 해당 연도 파티션으로 치환.
+    WHERE의 연도 조건은 그대로 두므로 결과는 동일하고, 읽는 양만 범위에 비례해 줄어듦.
+    파티션이 없거나(ETL 전·OLIST_YEAR_PARTITIONS 비활성) 범위가 모든 파티션을 덮으면 원본 테이블 그대로
+    (UNION ALL 서브쿼리는 원본 인덱스·정렬 순서를 못 쓰므로 전체 범위에선 오히려 느림)."""
+    version = data_version()
+    for table in PARTITIONED_TABLES:
+        parts = partition_years(table, version)
+        if not parts:
+            continue
+        hit = [y for y in parts if str(yf) <= y <= str(yt)]
+        if len(hit) == len(parts):
+            continue
+        if not hit:
+            src = f"(SELECT * FROM {table}_y{parts[0]} WHERE 0)"
+        elif len(hit) == 1:
+            src = f"{table}_y{hit[0]}"
+        else:
+            src = "(" + " UNION ALL ".join(f"SELECT * FROM {table}_y{y}" for y in hit) + ")"
+        sql = re.sub(rf"\b{table}\b", src, sql)
+    return sql
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 분석 엔진 라우팅: SQLite(기록 시스템) ↔ DuckDB(열 지향, 선택 설치)
+# - q(..., engine="analytics")인 읽기 전용 쿼리만 OLIST_ANALYTICS_ENGINE 설정을 따름
+# - DuckDB는 ETL이 만든 data/parquet/*.parquet을 data_version이 같을 때만 사용, 아니면 SQLite 파일을 ATTACH
+# - DuckDB 미설치/실패 시 항상 SQLite로 폴백
+# ─────────────────────────────────────────────────────────────────────────────
+ANALYTICS_ENGINE = os.getenv("OLIST_ANALYTICS_ENGINE", "sqlite")   # sqlite | duckdb
+PARQUET_DIR = DATA_DIR / "parquet"
+
+def resolve_engine(engine: str = "sqlite", sql: str = "") -> str:
+    """쿼리별 엔진 결정. 'analytics'는 설정값으로, 쓰기/PRAGMA/EXPLAIN 등은 항상 sqlite."""
+    if engine == "analytics":
+        engine = ANALYTICS_ENGINE
+    if engine != "duckdb":
+        return "sqlite"
+    if not sql.lstrip().lower().startswith(("select", "with")):
+        return "sqlite"
+    return "duckdb"
+
+def _rewrite_calls(sql: str, name: str, build) -> str:
+    """name(arg1, arg2, ...) 호출을 build(args)로 치환(괄호 깊이·문자열 리터럴 고려)."""
+    out, i = [], 0
+    pat = re.compile(rf"\b{name}\s*\(", re.IGNORECASE)
+    while True:
+        m = pat.search(sql, i)
+        if not m:
+            out.append(sql[i:])
+            return "".join(out)
+        out.append(sql[i:m.start()])
+        j, depth, quote, args, cur = m.end(), 1, None, [], []
+        while j < len(sql) and depth:
+            ch = sql[j]
+            if quote:
+                quote = None if ch == quote else quote
+            elif ch in "'\"":
+                quote = ch
+            elif ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+                if depth == 0:
+                    break
+            elif ch == "," and depth == 1:
+                args.append("".join(cur).strip())
+                cur = []
+                j += 1
+                continue
+            cur.append(ch)
+            j += 1
+        args.append("".join(cur).strip())
+        out.append(build([_rewrite_calls(a, name, build) for a in args]))
+        i = j + 1
+
+def to_duckdb_sql(sql: str) -> str:
+    """이 앱에서 쓰는 SQLite 문법 → DuckDB 문법.
+    strftime(fmt, x) → strftime(CAST(x AS TIMESTAMP), fmt), julianday(x) → 율리우스일(DOUBLE),
+    REAL → DOUBLE(DuckDB REAL은 float4), :name → $name."""
+    sql = _rewrite_calls(sql, "strftime", lambda a: f"strftime(CAST({a[1]} AS TIMESTAMP), {a[0]})")
+    sql = _rewrite_calls(
+        sql, "julianday",
+        lambda a: f"(CAST(epoch_ms(CAST({a[0]} AS TIMESTAMP)) AS DOUBLE) / 86400000 + 2440587.5)",
+    )
+    sql = re.sub(r"\bAS\s+REAL\b", "AS DOUBLE", sql, flags=re.IGNORECASE)
+    return re.sub(r"(?<![:\w]):([A-Za-z_]\w*)", r"$\1", sql)
+
+PARQUET_VERSION_FILE = PARQUET_DIR / "data_version"
+
+def parquet_version() -> str:
+    """Parquet 사본을 내보낸 시점의 data_version(scripts/etl.py export_parquet가 기록). 없으면 ''."""
+    try:
+        return PARQUET_VERSION_FILE.read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
+
+def _duckdb_token() -> tuple[str, str]:
+    """DuckDB 연결 캐시 키: SQLite 데이터 버전·Parquet 사본 버전(ETL 후 새 연결)."""
+    return data_version(), parquet_version()
+
+@st.cache_resource
+def get_duckdb(token: tuple[str, str] = ("", "")):
+    """DuckDB 연결(없으면 None). token이 바뀌면(ETL 후) 새로 만듦.
+    Parquet 사본 버전이 SQLite data_version과 같을 때만 테이블명 그대로 뷰로 등록(오래된 사본은 건너뜀),
+    빠진 테이블은 SQLite 파일 ATTACH로 보충 → SQLite 경로와 같은 데이터만 읽음."""
+    try:
+        import duckdb
+    except ImportError:
+        return None
+    con = duckdb.connect()
+    db_version, pq_version = token
+    fresh = bool(db_version) and pq_version == db_version
+    files = sorted(PARQUET_DIR.glob("*.parquet")) if fresh and PARQUET_DIR.exists() else []
+    for f in files:
+        con.execute(f"CREATE VIEW {f.stem} AS SELECT * FROM read_parquet('{f.as_posix()}')")
+    if DB_PATH.exists():
+        try:
+            con.execute("INSTALL sqlite; LOAD sqlite;")
+            con.execute(f"ATTACH '{DB_PATH.as_posix()}' AS olist (TYPE SQLITE, READ_ONLY);")
+            # 이름 해석: 최신 Parquet 뷰(memory.main) → SQLite 테이블(olist.main)
+            con.execute("SET search_path = 'memory.main,olist.main';")
+        except Exception:
+            if not files:
+                return None  # 확장 설치 불가(오프라인 등) + 사용할 Parquet 없음 → 항상 SQLite 사용
+    elif not files:
+        return None
+    return con
+
+def run_duckdb(sql: str, params: dict | None = None) -> pd.DataFrame:
+    con = get_duckdb(_duckdb_token())
+    if con is None:
+        raise RuntimeError("DuckDB를 사용할 수 없습니다(미설치 또는 데이터 없음).")
+    # 커서 = 독립 연결 → Streamlit 스크립트 스레드 간 안전
+    return con.cursor().execute(to_duckdb_sql(sql), params or {}).df()
+
+def run_sqlite(sql: str, params: dict | None = None) -> pd.DataFrame:
+    """SQLAlchemy 우선, 실패 시 sqlite3 폴백. 둘 다 실패하면 예외."""
+    params = params or {}
+    try:
+        with get_engine().begin() as conn:
+            return pd.read_sql(text(sql), conn, params=params)
+    except Exception:
+        with sqlite3.connect(DB_PATH) as con:
+            return pd.read_sql_query(sql, con, params=params)
+
+@st.cache_data(ttl=900)
+def q(
+    sql: str,
+    params: dict | None = None,
+    years: tuple[str, str] | None = None,
+    engine: str = "sqlite",
+    compact: bool = False,
+) -> pd.DataFrame:
+    """읽기 전용 쿼리. 테이블 없으면 빈 DF 반환(페이지에서 안내).
+    years=(yf, yt)를 주면 연도 파티션만 읽도록 재작성(prune_partitions, SQLite 경로).
+    engine="analytics"면 OLIST_ANALYTICS_ENGINE 설정에 따라 DuckDB로 보낼 수 있음.
+    compact=True면 저카디널리티 문자열 컬럼을 category로 캐시(compact_frame)."""
     params = params or {}
 
     # 가장 흔히 조회하는 테이블명을 heuristic하게 추출해서 존재 확인
@@ -49,24 +274,35 @@ def q(sql: str, params: dict | None = None) -> pd.DataFrame:
     except Exception:
         pass
 
-    # 우선 SQLAlchemy
-    try:
-        with get_engine().begin() as conn:
-            return pd.read_sql(text(sql), conn, params=params)
-    except Exception:
-        # 폴백 sqlite3
+    if resolve_engine(engine, sql) == "duckdb":
         try:
-            with sqlite3.connect(DB_PATH) as con:
-                return pd.read_sql_query(sql, con, params=params)
+            return compact_frame(run_duckdb(sql, params), categories=compact)
         except Exception:
-            # 최종 폴백: 빈 DF 반환 (페이지 측에서 안내)
-            return pd.DataFrame()
+            pass  # SQLite로 폴백
+
+    if years:
+        sql = prune_partitions(sql, *years)
+    try:
+        return compact_frame(run_sqlite(sql, params), categories=compact)
+    except Exception:
+        # 최종 폴백: 빈 DF 반환 (페이지 측에서 안내)
+        return pd.DataFrame()
 
 @st.cache_data(ttl=900)
+def get_dim(kind: str, name: str) -> pd.DataFrame:
+    """ETL 필터 메타데이터(dim_metadata)에서 (value, label, n) 조회. 테이블이 없으면 빈 DF."""
+    return q(
+        "SELECT value, label, n FROM dim_metadata WHERE kind = :kind AND name = :name ORDER BY value",
+        {"kind": kind, "name": name},
+    )
+
 def get_years_from(table: str, ts_col: str) -> list[str]:
-    """연도 리스트. 테이블/컬럼 없으면 기본값 반환."""
+    """연도 리스트. dim_metadata 우선, 없으면(구버전 DB) DISTINCT 스캔, 테이블도 없으면 빈 리스트(호출 측에서 ETL 안내)."""
+    df = get_dim("year", f"{table}.{ts_col}")
+    if not df.empty:
+        return df["value"].astype(str).tolist()
     if not _table_exists(table):
-        return ["2016", "2017", "2018"]
+        return []
     sql = f"""
     SELECT DISTINCT strftime('%Y', {ts_col}) AS y
     FROM {table}
@@ -74,4 +310,56 @@ def get_years_from(table: str, ts_col: str) -> list[str]:
     ORDER BY 1
     """
     df = q(sql)
-    return df["y"].dropna().astype(str).tolist() if not df.empty else ["2016","2017","2018"]
+    return df["y"].dropna().astype(str).tolist() if not df.empty else []
+
+def get_states(col: str = "customer_state") -> list[str]:
+    """STATE 리스트(customer_state | seller_state). dim_metadata 우선, 없으면 DISTINCT 스캔."""
+    df = get_dim("state", col)
+    if not df.empty:
+        return df["value"].astype(str).tolist()
+    table = "olist_customers_dataset" if col == "customer_state" else "olist_sellers_dataset"
+    df = q(f"SELECT DISTINCT {col} AS st FROM {table} WHERE {col} IS NOT NULL ORDER BY 1")
+    return df["st"].dropna().astype(str).tolist() if not df.empty else []
+
+def get_category_labels() -> dict[str, str]:
+    """카테고리 → 영문 번역(product_category_name_translation 기준, 번역 없으면 원문)."""
+    df = get_dim("category", "product_category_name")
+    if df.empty:
+        return {}
+    return {str(v): str(l) if pd.notna(l) else str(v) for v, l in zip(df["value"], df["label"])}
+
+def fts_match_expr(text_in: str) -> str:
+    """사용자 입력 → FTS5 MATCH 식. 각 단어를 따옴표로 감싸 문법 오류 방지(AND 결합).
+    단어 끝의 *는 접두어 검색으로 유지(예: entreg* → entrega/entregue)."""
+    terms = []
+    for w in text_in.replace('"', " ").split():
+        prefix = w.endswith("*")
+        w = w.rstrip("*")
+        if w:
+            terms.append(f'"{w}"*' if prefix else f'"{w}"')
+    return " ".join(terms)
+
+def hist_percentiles(
+    hist: pd.DataFrame,
+    qs: tuple[float, ...] = (0.5, 0.9),
+    bucket_col: str = "bucket",
+    count_col: str = "orders",
+    width: float = 1.0,
+) -> dict[float, float]:
+    """고정폭 히스토그램(구간 하한 = bucket × width)을 합쳐 백분위 계산.
+    구간 내부는 선형 보간 → 오차는 width 이내(마지막 overflow 구간 제외)."""
+    h = hist.groupby(bucket_col, observed=True)[count_col].sum().sort_index()
+    total = float(h.sum())
+    if total <= 0:
+        return {qv: float("nan") for qv in qs}
+    cum = h.cumsum()
+    out = {}
+    for qv in qs:
+        target = qv * total
+        pos = int(cum.searchsorted(target))
+        pos = min(pos, len(h) - 1)
+        b, cnt = h.index[pos], float(h.iloc[pos])
+        prev = float(cum.iloc[pos - 1]) if pos > 0 else 0.0
+        out[qv] = (float(b) + (target - prev) / cnt) * width
+    return out
+
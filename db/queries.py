@@ -0,0 +1,132 @@
+# db/queries.py
+# 화면과 캐시 예열(db/warmup.py)이 공유하는 SQL 빌더.
+# st.cache_data 키는 SQL 문자열·파라미터로 정해지므로, 같은 필터면 항상 같은 문자열이 나오도록 여기서만 생성
+from __future__ import annotations
+
+# ─────────────────────────────────────────────────────────────────────────────
+# app.py 대시보드
+# ─────────────────────────────────────────────────────────────────────────────
+def dashboard_where(states: list[str] | None = None) -> str:
+    """구매 연도(:yf~:yt) + 고객 STATE 필터 WHERE 절."""
+    base_where = ["o.order_purchase_timestamp IS NOT NULL",
+                  "strftime('%Y', o.order_purchase_timestamp) BETWEEN :yf AND :yt"]
+    if states:
+        states_str = ",".join(f"'{s}'" for s in states)
+        base_where.append(f"""
+        o.customer_id IN (
+            SELECT customer_id FROM olist_customers_dataset
+            WHERE customer_state IN ({states_str})
+        )
+    """)
+    return "WHERE " + " AND ".join(base_where)
+
+def kpi_sql(where_sql: str) -> str:
+    return f"""
+    SELECT
+      (SELECT count(*) FROM olist_orders_dataset o {where_sql}) AS orders_cnt,
+      (SELECT sum(p.payment_value)
+         FROM olist_order_payments_dataset p
+         JOIN olist_orders_dataset o USING(order_id) {where_sql}) AS pay_sum,
+      (SELECT avg(cnt) FROM (
+          SELECT count(*) AS cnt
+          FROM olist_order_items_dataset i
+          JOIN olist_orders_dataset o USING(order_id) {where_sql}
+          GROUP BY o.order_id
+      )) AS avg_items
+    """
+
+def cats_sql(where_sql: str) -> str:
+    return f"""
+        SELECT count(DISTINCT p.product_category_name) AS cats
+        FROM olist_order_items_dataset i
+        JOIN olist_orders_dataset o USING(order_id)
+        JOIN olist_products_dataset p USING(product_id)
+        {where_sql}
+        """
+
+def trend_sql(where_sql: str) -> str:
+    return f"""
+    SELECT strftime('%Y-%m', o.order_purchase_timestamp) AS ym, count(*) AS orders
+    FROM olist_orders_dataset o
+    {where_sql}
+    GROUP BY 1 ORDER BY 1
+    """
+
+def top_sql(where_sql: str, topn: int) -> str:
+    return f"""
+    SELECT p.product_category_name AS category, count(*) AS cnt
+    FROM olist_order_items_dataset i
+    JOIN olist_orders_dataset o USING(order_id)
+    JOIN olist_products_dataset p USING(product_id)
+    {where_sql}
+    GROUP BY 1
+    ORDER BY 2 DESC
+    LIMIT {int(topn)}
+    """
+
+# ─────────────────────────────────────────────────────────────────────────────
+# pages/01_reviews.py
+# ─────────────────────────────────────────────────────────────────────────────
+REVIEW_MONTHLY_SQL = """
+SELECT ym, avg_score, rolling_avg_3m, reviews, s1, s2, s3, s4, s5
+FROM review_monthly
+WHERE y BETWEEN :yf AND :yt
+ORDER BY ym
+"""
+
+# ─────────────────────────────────────────────────────────────────────────────
+# pages/02_rfm_segments.py
+# ─────────────────────────────────────────────────────────────────────────────
+def rfm_where(states_txt: str = "") -> str:
+    """구매 연도(:yf~:yt) + 콤마 구분 STATE 텍스트 필터 WHERE 절."""
+    where = ["strftime('%Y', o.order_purchase_timestamp) BETWEEN :yf AND :yt"]
+    if states_txt:
+        inlist = ",".join(f"'{s.strip()}'" for s in states_txt.split(",") if s.strip())
+        where.append(f"""o.customer_id IN (
+        SELECT customer_id
+        FROM olist_customers_dataset
+        WHERE customer_state IN ({inlist})
+    )""")
+    return "WHERE " + " AND ".join(where)
+
+def rfm_sql(where_sql: str) -> str:
+    return f"""
+WITH filtered AS (
+  SELECT o.order_id, o.customer_id, o.order_purchase_timestamp
+  FROM olist_orders_dataset o
+  {where_sql}
+),
+pay AS (
+  SELECT order_id, SUM(payment_value) AS monetary
+  FROM olist_order_payments_dataset
+  GROUP BY 1
+),
+deliv AS (
+  SELECT order_id, order_delivered_customer_date
+  FROM olist_orders_dataset
+  WHERE order_delivered_customer_date IS NOT NULL
+),
+cust AS (
+  SELECT
+    f.customer_id,
+    MAX(d.order_delivered_customer_date) AS last_delivered,
+    COUNT(DISTINCT f.order_id)          AS frequency,
+    COALESCE(SUM(p.monetary), 0)        AS monetary
+  FROM filtered f
+  LEFT JOIN deliv d USING(order_id)
+  LEFT JOIN pay   p USING(order_id)
+  GROUP BY f.customer_id
+),
+last_date AS (
+  SELECT MAX(d.order_delivered_customer_date) AS max_delivered
+  FROM filtered f
+  JOIN deliv d USING(order_id)
+)
+SELECT
+  c.customer_id,
+  CAST(julianday(l.max_delivered) - julianday(c.last_delivered) AS REAL) AS recency_days,
+  c.frequency,
+  c.monetary
+FROM cust c
+CROSS JOIN last_date l
+"""
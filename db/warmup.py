@@ -0,0 +1,149 @@
+# db/warmup.py
+# 결과 캐시 예열: ETL 직후·워커 재시작 후 첫 방문자가 기본 필터 쿼리 비용을 치르지 않도록
+# 기본 조합 + 최근 쿼리 로그의 인기 조합을 미리 실행해 st.cache_data를 채움
+# - 페이지는 log_filters()로 실제 사용한 필터 조합을 data/query_log.jsonl에 기록
+# - app.py 부팅 시 start_prewarm()이 백그라운드 스레드로 prewarm() 실행(프로세스·DB 버전당 1회)
+# - scripts/etl.py --prewarm은 인기 조합을 etl_state(prewarm_filters)에 남겨 로그가 없는 배포 환경에서도 사용
+from __future__ import annotations
+import json
+import threading
+import time
+from collections import Counter
+
+import pandas as pd
+import streamlit as st
+
+from db.models import DATA_DIR, get_states, get_years_from, prune_partitions, q, run_sqlite
+from db.queries import (
+    REVIEW_MONTHLY_SQL,
+    cats_sql, dashboard_where, kpi_sql, rfm_sql, rfm_where, top_sql, trend_sql,
+)
+
+QUERY_LOG = DATA_DIR / "query_log.jsonl"
+LOG_WINDOW = 2000          # 인기 조합 집계에 쓰는 최근 로그 줄 수
+LOG_MAX_BYTES = 1 << 20    # 로그가 이보다 커지면 최근 LOG_WINDOW 줄만 남김
+POPULAR_TOP = 3            # 페이지별로 예열할 인기 조합 수
+DASHBOARD_TOPN = 15        # app.py 사이드바 Top N 기본값
+PAGES = ("dashboard", "rfm", "reviews")
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 쿼리 로그
+# ─────────────────────────────────────────────────────────────────────────────
+def log_filters(page: str, filters: dict) -> None:
+    """실제로 조회한 필터 조합 기록(세션 내 같은 조합 반복은 1회). 실패해도 화면에는 영향 없음."""
+    line = json.dumps({"page": page, "filters": filters}, ensure_ascii=False, sort_keys=True)
+    try:
+        if st.session_state.get(f"_qlog_{page}") == line:
+            return
+        st.session_state[f"_qlog_{page}"] = line
+    except Exception:
+        pass
+    try:
+        if QUERY_LOG.exists() and QUERY_LOG.stat().st_size > LOG_MAX_BYTES:
+            tail = QUERY_LOG.read_text(encoding="utf-8").splitlines()[-LOG_WINDOW:]
+            QUERY_LOG.write_text("\n".join(tail) + "\n", encoding="utf-8")
+        with QUERY_LOG.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError:
+        pass
+
+def logged_popular(page: str, top: int = POPULAR_TOP) -> list[dict]:
+    """최근 로그 LOG_WINDOW 줄에서 page의 필터 조합을 빈도순 top개."""
+    if not QUERY_LOG.exists():
+        return []
+    counts = Counter()
+    for raw in QUERY_LOG.read_text(encoding="utf-8").splitlines()[-LOG_WINDOW:]:
+        try:
+            rec = json.loads(raw)
+        except ValueError:
+            continue
+        if rec.get("page") == page:
+            counts[json.dumps(rec.get("filters", {}), ensure_ascii=False, sort_keys=True)] += 1
+    return [json.loads(k) for k, _ in counts.most_common(top)]
+
+def stored_popular() -> dict:
+    """ETL이 etl_state에 남긴 인기 조합 {page: [filters, ...]} (없으면 빈 dict)."""
+    try:
+        df = run_sqlite("SELECT value FROM etl_state WHERE key = 'prewarm_filters'")
+        return json.loads(df["value"].iloc[0]) if not df.empty else {}
+    except Exception:
+        return {}
+
+def filter_combos(page: str, default: dict, top: int = POPULAR_TOP) -> list[dict]:
+    """예열 대상 = 기본 조합 + 인기 조합(로컬 로그 우선, 없으면 etl_state). 중복 제거."""
+    popular = logged_popular(page, top) or stored_popular().get(page, [])[:top]
+    combos, seen = [], set()
+    for f in [default, *popular]:
+        k = json.dumps(f, sort_keys=True)
+        if k not in seen:
+            seen.add(k)
+            combos.append(f)
+    return combos
+
+# ─────────────────────────────────────────────────────────────────────────────
+# 예열 작업: 화면과 같은 함수·같은 인자(위치/키워드 모양까지)로 호출해야 캐시 키가 일치
+# ─────────────────────────────────────────────────────────────────────────────
+def dashboard_jobs(run, combos: list[dict]) -> list[tuple]:
+    jobs = []
+    for f in combos:
+        yf, yt = f["years"]
+        where_sql = dashboard_where(f.get("states") or [])
+        kw = {"params": {"yf": yf, "yt": yt}, "years": (yf, yt)}
+        jobs += [
+            (run, (kpi_sql(where_sql),), {**kw, "engine": "analytics"}),
+            (run, (cats_sql(where_sql),), {**kw, "engine": "analytics"}),
+            (run, (trend_sql(where_sql),), kw),
+            (run, (top_sql(where_sql, f.get("topn", DASHBOARD_TOPN)),), {**kw, "engine": "analytics"}),
+        ]
+    return jobs
+
+def rfm_jobs(run, combos: list[dict]) -> list[tuple]:
+    return [
+        (run, (rfm_sql(rfm_where(f.get("states_txt", ""))), {"yf": f["years"][0], "yt": f["years"][1]}),
+         {"years": tuple(f["years"]), "engine": "analytics"})
+        for f in combos
+    ]
+
+def review_jobs(run, combos: list[dict]) -> list[tuple]:
+    return [(run, (REVIEW_MONTHLY_SQL, {"yf": f["years"][0], "yt": f["years"][1]}), {}) for f in combos]
+
+def run_jobs(jobs: list[tuple]) -> tuple[int, int, float]:
+    """순차 실행. (성공 수, 실패 수, 소요 초)."""
+    ok = failed = 0
+    t0 = time.perf_counter()
+    for fn, args, kwargs in jobs:
+        try:
+            fn(*args, **kwargs)
+            ok += 1
+        except Exception:
+            failed += 1
+    return ok, failed, time.perf_counter() - t0
+
+def prewarm(app_q=None, page_q=q) -> tuple[int, int, float]:
+    """기본·인기 필터 조합 쿼리 실행. app_q는 app.py의 캐시 함수(q), page_q는 pages/*가 쓰는 db.models.q."""
+    jobs = []
+    years = get_years_from("olist_orders_dataset", "order_purchase_timestamp")
+    get_states("customer_state")
+    if years:  # 빈 리스트 = 원본 테이블 없음(ETL 전) → 해당 페이지 예열 생략
+        if app_q is not None:
+            default = {"years": [years[0], years[-1]], "states": [], "topn": DASHBOARD_TOPN}
+            jobs += dashboard_jobs(app_q, filter_combos("dashboard", default))
+        jobs += rfm_jobs(page_q, filter_combos("rfm", {"years": [years[0], years[-1]], "states_txt": ""}))
+    years = get_years_from("olist_order_reviews_dataset", "review_creation_date")
+    if years:
+        jobs += review_jobs(page_q, filter_combos("reviews", {"years": [years[0], years[-1]]}))
+    return run_jobs(jobs)
+
+@st.cache_resource(show_spinner=False)
+def start_prewarm(token: str, _app_q=None) -> threading.Thread:
+    """token(DB 파일 수정 시각 등)마다 한 번만 데몬 스레드로 prewarm 시작 → 첫 화면 렌더링을 막지 않음."""
+    t = threading.Thread(target=prewarm, args=(_app_q,), name="olist-prewarm", daemon=True)
+    t.start()
+    return t
+
+def plain_q(sql: str, params: dict | None = None, years: tuple[str, str] | None = None,
+            engine: str = "sqlite") -> pd.DataFrame:
+    """캐시 없이 SQLite로 바로 실행(ETL 단계용, q()와 같은 시그니처)."""
+    if years:
+        sql = prune_partitions(sql, *years)
+    return run_sqlite(sql, params)
@@ -1,39 +1,38 @@
 # pages/01_reviews.py
+import html
 import plotly.express as px
 import streamlit as st
 import pandas as pd
-from db.models import q, get_years_from
+from db.models import q, get_years_from, fts_match_expr
+from db.queries import REVIEW_MONTHLY_SQL
+from db.warmup import log_filters
 
 st.title("🔎 리뷰 분석")
 
 # 필터
 years = get_years_from("olist_order_reviews_dataset", "review_creation_date")
+if not years:
+    st.info("리뷰 데이터가 없습니다. `python scripts/etl.py --load` 실행 후 새로고침하세요.")
+    st.stop()
 yf, yt = st.sidebar.select_slider("리뷰 연도 범위", options=years, value=(years[0], years[-1]))
 min_len = st.sidebar.slider("최소 리뷰 글자수(요약용)", 0, 50, 0)
 
-# 집계
-sql = """
-SELECT strftime('%Y-%m', review_creation_date) AS ym,
-       AVG(review_score)                         AS avg_score,
-       COUNT(*)                                  AS reviews
-FROM olist_order_reviews_dataset
-WHERE review_creation_date IS NOT NULL
-  AND strftime('%Y', review_creation_date) BETWEEN :yf AND :yt
-GROUP BY 1
-ORDER BY 1
-"""
-df = q(sql, {"yf": yf, "yt": yt})
+# 집계 (ETL 사전 집계 테이블 review_monthly 사용 → 원본 테이블 스캔 없음)
+log_filters("reviews", {"years": [yf, yt]})
+df = q(REVIEW_MONTHLY_SQL, {"yf": yf, "yt": yt})
 
 if df.empty or not {"ym","avg_score","reviews"}.issubset(df.columns):
-    st.info("해당 구간 리뷰가 없습니다. 범위를 조정해 주세요.")
+    st.info("해당 구간 리뷰가 없습니다. 범위를 조정해 주세요. (집계 테이블이 없다면 `python scripts/etl.py --aggregates-only` 실행)")
 else:
     c1, c2 = st.columns(2)
     with c1:
-        st.subheader("월별 평균 평점")
-        st.plotly_chart(px.line(df, x="ym", y="avg_score"), use_container_width=True)
+        st.subheader("월별 평균 평점 (3개월 이동평균)")
+        st.plotly_chart(px.line(df, x="ym", y=["avg_score", "rolling_avg_3m"]), use_container_width=True)
     with c2:
-        st.subheader("월별 리뷰 수")
-        st.plotly_chart(px.bar(df, x="ym", y="reviews"), use_container_width=True)
+        st.subheader("월별 평점 분포")
+        dist = df.melt(id_vars="ym", value_vars=["s1", "s2", "s3", "s4", "s5"], var_name="score", value_name="cnt")
+        dist["score"] = dist["score"].str[1]
+        st.plotly_chart(px.bar(dist, x="ym", y="cnt", color="score"), use_container_width=True)
 
     st.subheader("데이터")
     st.dataframe(df, use_container_width=True, height=360)
@@ -44,17 +43,46 @@ low_sql = """
 SELECT review_id, review_score, SUBSTR(review_comment_message,1,280) AS snippet,
        strftime('%Y-%m', review_creation_date) AS ym
 FROM olist_order_reviews_dataset
-WHERE review_creation_date IS NOT NULL
-  AND strftime('%Y', review_creation_date) BETWEEN :yf AND :yt
-  AND review_score <= 2
+WHERE review_score <= 2
+  AND review_creation_date >= :d_from AND review_creation_date < :d_to
   AND (review_comment_message IS NULL OR length(review_comment_message) >= :min_len)
 ORDER BY review_score ASC, review_creation_date DESC
 LIMIT 200
 """
-low = q(low_sql, {"yf": yf, "yt": yt, "min_len": min_len})
+# 연도 범위를 날짜 범위로 바꿔 idx_reviews_score_date 순서대로 읽고 LIMIT에서 멈춤
+low = q(low_sql, {"d_from": f"{yf}-01-01", "d_to": f"{int(yt) + 1}-01-01", "min_len": min_len}, years=(yf, yt))
 with st.expander("🧯 저평점 리뷰 빠른 스캔(최근 200개)"):
     st.dataframe(low, use_container_width=True, height=360)
 
+# 키워드 검색 (FTS5: fts_reviews, bm25 순위 + 스니펫 하이라이트)
+st.subheader("🔍 리뷰 키워드 검색")
+kw = st.text_input("검색어 (포르투갈어, 악센트 무시 · 단어 끝 * 는 접두어 검색)", "").strip()
+smin, smax = st.select_slider("평점 범위", options=[1, 2, 3, 4, 5], value=(1, 5))
+match = fts_match_expr(kw)
+if match:
+    search_sql = """
+    SELECT r.review_id, r.review_score,
+           strftime('%Y-%m', r.review_creation_date) AS ym,
+           snippet(fts_reviews, -1, char(2), char(3), '…', 16) AS snippet,
+           bm25(fts_reviews) AS rank
+    FROM fts_reviews
+    JOIN olist_order_reviews_dataset r ON r.rowid = fts_reviews.rowid
+    WHERE fts_reviews MATCH :match
+      AND strftime('%Y', r.review_creation_date) BETWEEN :yf AND :yt
+      AND r.review_score BETWEEN :smin AND :smax
+    ORDER BY rank
+    LIMIT 50
+    """
+    hits = q(search_sql, {"match": match, "yf": yf, "yt": yt, "smin": smin, "smax": smax})
+    if hits.empty:
+        st.info("검색 결과가 없습니다. (검색 인덱스가 없다면 `python scripts/etl.py --fts-only` 실행)")
+    else:
+        st.caption(f"상위 {len(hits)}건 (관련도순)")
+        for _, h in hits.iterrows():
+            text = html.escape(str(h["snippet"] or "")).replace("\x02", "<mark>").replace("\x03", "</mark>")
+            st.markdown(f"**{'★' * int(h['review_score'])}** · {h['ym']} · `{h['review_id']}`<br>{text}",
+                        unsafe_allow_html=True)
+
 if df.empty or not {"ym","avg_score","reviews"}.issubset(df.columns):
     st.info("해당 구간 리뷰가 없습니다. (DB가 아직 준비 중이거나, 필터에 해당 데이터가 없습니다.)")
     st.stop()
\ No newline at end of file
@@ -4,11 +4,17 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 from db.models import q, get_years_from
+from db.queries import rfm_where, rfm_sql
+from db.warmup import log_filters
+from viz.charts import scatter
 
 st.title("👥 RFM 세그먼트 (인터랙티브)")
 
 # ───────────────────────────── 필터 영역 ─────────────────────────────
 years = get_years_from("olist_orders_dataset", "order_purchase_timestamp")
+if not years:
+    st.info("주문 데이터가 없습니다. `python scripts/etl.py --load` 실행 후 새로고침하세요.")
+    st.stop()
 yf, yt = st.sidebar.select_slider("구매 연도 범위", options=years, value=(years[0], years[-1]))
 states_txt = st.sidebar.text_input("주(STATE) 필터, 콤마 구분 (예: SP,RJ)", "").strip()
 
@@ -24,62 +30,14 @@ min_money  = st.sidebar.number_input("최소 매출(M) 필터", min_value=0.0, v
 max_recency= st.sidebar.number_input("최대 Recency(일) 필터(0은 제한없음)", min_value=0, value=0, step=10)
 
 log_money  = st.sidebar.checkbox("매출 로그스케일 사용(log10)", value=False)
-top_n      = st.sidebar.slider("표·산점도 상위 N(총 RFM 점수 기준)", 100, 5000, 1000, step=100)
+top_n      = st.sidebar.slider("표 상위 N(총 RFM 점수 기준)", 100, 5000, 1000, step=100)
+plot_mode  = st.sidebar.radio("대용량 산점도 표시", ["층화 샘플링", "밀도(격자 집계)"], horizontal=True)
 
 # ───────────────────────────── SQL 집계 ─────────────────────────────
-where = ["strftime('%Y', o.order_purchase_timestamp) BETWEEN :yf AND :yt"]
+# SQL은 db/queries.py에서 생성(캐시 예열과 같은 문자열 → 같은 캐시 키)
 params = {"yf": yf, "yt": yt}
-
-if states_txt:
-    inlist = ",".join(f"'{s.strip()}'" for s in states_txt.split(",") if s.strip())
-    where.append(f"""o.customer_id IN (
-        SELECT customer_id
-        FROM olist_customers_dataset
-        WHERE customer_state IN ({inlist})
-    )""")
-where_sql = "WHERE " + " AND ".join(where)
-
-rfm_sql = f"""
-WITH filtered AS (
-  SELECT o.order_id, o.customer_id, o.order_purchase_timestamp
-  FROM olist_orders_dataset o
-  {where_sql}
-),
-pay AS (
-  SELECT order_id, SUM(payment_value) AS monetary
-  FROM olist_order_payments_dataset
-  GROUP BY 1
-),
-deliv AS (
-  SELECT order_id, order_delivered_customer_date
-  FROM olist_orders_dataset
-  WHERE order_delivered_customer_date IS NOT NULL
-),
-cust AS (
-  SELECT
-    f.customer_id,
-    MAX(d.order_delivered_customer_date) AS last_delivered,
-    COUNT(DISTINCT f.order_id)          AS frequency,
-    COALESCE(SUM(p.monetary), 0)        AS monetary
-  FROM filtered f
-  LEFT JOIN deliv d USING(order_id)
-  LEFT JOIN pay   p USING(order_id)
-  GROUP BY f.customer_id
-),
-last_date AS (
-  SELECT MAX(d.order_delivered_customer_date) AS max_delivered
-  FROM filtered f
-  JOIN deliv d USING(order_id)
-)
-SELECT
-  c.customer_id,
-  CAST(julianday(l.max_delivered) - julianday(c.last_delivered) AS REAL) AS recency_days,
-  c.frequency,
-  c.monetary
-FROM cust c
-CROSS JOIN last_date l
-"""
-rfm = q(rfm_sql, params)
+log_filters("rfm", {"years": [yf, yt], "states_txt": states_txt})
+rfm = q(rfm_sql(rfm_where(states_txt)), params, years=(yf, yt), engine="analytics")
 
 # ───────────────────────────── 방어 로직 ─────────────────────────────
 if rfm.empty or not {"recency_days","frequency","monetary"}.issubset(rfm.columns):
@@ -142,23 +100,21 @@ def label_row(r, k):
 
 rfm["segment"] = rfm.apply(lambda r: label_row(r, k), axis=1)
 
-# 시각화용 변환
+# 시각화용 변환: 산점도는 필터 후 전체 고객 대상(포인트 수는 scatter()의 층화 샘플링/격자 집계가 제한)
 plot_df = rfm.copy()
 if log_money:
     plot_df["monetary"] = np.log10(plot_df["monetary"].replace(0, np.nan)).fillna(0)
 
-# 상위 N (총점) 제한
-plot_df = plot_df.sort_values("RFM", ascending=False).head(top_n)
-
 # ───────────────────────────── 시각화 ─────────────────────────────
 c1, c2 = st.columns([1.2, 1.0])
 with c1:
     st.subheader("빈도 × 매출 (버블=RFM)")
-    fig = px.scatter(
+    fig = scatter(
         plot_df,
         x="frequency", y="monetary",
         size="RFM", color="segment",
         hover_data=["customer_id","recency_days","R","F","M","RFM"],
+        mode="density" if plot_mode.startswith("밀도") else "sample",
     )
     st.plotly_chart(fig, use_container_width=True, theme="streamlit")
 with c2:
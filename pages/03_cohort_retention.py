@@ -0,0 +1,52 @@
+# pages/03_cohort_retention.py
+import plotly.express as px
+import streamlit as st
+from db.models import q
+
+st.title("📅 코호트 리텐션")
+
+# ETL 사전 집계 테이블(customer_cohort)만 조회 → 원본 주문/고객 self-join 없음
+cohort = q("""
+SELECT cohort_ym, months_since, active_customers, revenue
+FROM customer_cohort
+ORDER BY cohort_ym, months_since
+""")
+
+if cohort.empty or not {"cohort_ym","months_since","active_customers"}.issubset(cohort.columns):
+    st.info("코호트 테이블이 없습니다. `python scripts/etl.py --aggregates-only` 실행 후 새로고침하세요.")
+    st.stop()
+
+# 필터
+cohorts = sorted(cohort["cohort_ym"].astype(str).unique().tolist())
+cf, ct = st.sidebar.select_slider("첫 구매월(코호트) 범위", options=cohorts, value=(cohorts[0], cohorts[-1]))
+max_m = st.sidebar.slider("최대 경과 개월", 1, int(cohort["months_since"].max() or 1), min(12, int(cohort["months_since"].max() or 1)))
+metric = st.sidebar.radio("지표", ["리텐션(%)", "활성 고객 수", "매출"], index=0)
+
+view = cohort[(cohort["cohort_ym"].astype(str).between(cf, ct)) & (cohort["months_since"] <= max_m)]
+size = view[view["months_since"] == 0].set_index("cohort_ym")["active_customers"]
+
+col = {"리텐션(%)": "retention", "활성 고객 수": "active_customers", "매출": "revenue"}[metric]
+# 분모(코호트 크기)는 문자열 키로 매핑 → cohort_ym이 category여도 결과가 숫자형으로 유지됨
+cohort_size = view["cohort_ym"].astype(str).map(size.rename(index=str)).astype(float)
+view = view.assign(retention=view["active_customers"] / cohort_size * 100)
+mat = view.pivot(index="cohort_ym", columns="months_since", values=col).sort_index()
+
+st.subheader(f"코호트 × 경과 개월 — {metric}")
+fig = px.imshow(
+    mat,
+    aspect="auto",
+    color_continuous_scale="Blues",
+    labels={"x": "경과 개월", "y": "첫 구매월", "color": metric},
+    text_auto=".1f" if col == "retention" else ".0f",
+)
+st.plotly_chart(fig, use_container_width=True)
+
+c1, c2 = st.columns(2)
+with c1:
+    st.metric("코호트 수", f"{len(mat):,}")
+with c2:
+    st.metric("신규 고객(선택 구간)", f"{int(size.sum()):,}")
+
+st.subheader("데이터")
+st.dataframe(mat, use_container_width=True, height=360)
+st.download_button("CSV 다운로드", mat.to_csv().encode("utf-8"), "cohort_retention.csv")
@@ -0,0 +1,59 @@
+# pages/04_lead_time.py
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+from db.models import q, hist_percentiles
+
+st.title("🚚 배송 리드타임 백분위")
+
+# ETL 히스토그램(lead_time_hist)을 한 번 읽고, 필터 조합별 백분위는 메모리에서 구간 병합으로 계산
+hist = q("SELECT ym, customer_state, seller_state, bucket, orders FROM lead_time_hist", compact=True)
+width_df = q("SELECT value FROM etl_state WHERE key = 'lead_bucket_days'")
+width = float(width_df["value"].iloc[0]) if not width_df.empty else 1.0
+
+if hist.empty or not {"ym","bucket","orders"}.issubset(hist.columns):
+    st.info("리드타임 히스토그램이 없습니다. `python scripts/etl.py --aggregates-only` 실행 후 새로고침하세요.")
+    st.stop()
+
+# 필터
+months = sorted(hist["ym"].astype(str).unique().tolist())
+years = sorted({m[:4] for m in months})
+yf, yt = st.sidebar.select_slider("구매 연도 범위", options=years, value=(years[0], years[-1]))
+c_states = st.sidebar.multiselect("고객 STATE", sorted(hist["customer_state"].dropna().astype(str).unique()))
+s_states = st.sidebar.multiselect("판매자 STATE", sorted(hist["seller_state"].dropna().astype(str).unique()))
+group_by = st.sidebar.radio("그룹 기준", ["고객 STATE", "판매자 STATE"], horizontal=True)
+
+h = hist[hist["ym"].astype(str).str[:4].between(yf, yt)]
+if c_states:
+    h = h[h["customer_state"].isin(c_states)]
+if s_states:
+    h = h[h["seller_state"].isin(s_states)]
+
+if h.empty:
+    st.info("필터 결과가 비어있습니다. 필터 범위를 완화하세요.")
+    st.stop()
+
+def pct_table(df: pd.DataFrame, key: str) -> pd.DataFrame:
+    rows = []
+    for k, g in df.groupby(key, observed=True):
+        p = hist_percentiles(g, (0.5, 0.9), width=width)
+        rows.append({key: k, "orders": int(g["orders"].sum()), "p50_days": p[0.5], "p90_days": p[0.9]})
+    return pd.DataFrame(rows)
+
+overall = hist_percentiles(h, (0.5, 0.9, 0.99), width=width)
+c1, c2, c3, c4 = st.columns(4)
+with c1: st.metric("주문(주문×판매자)", f"{int(h['orders'].sum()):,}")
+with c2: st.metric("p50 (일)", f"{overall[0.5]:.1f}")
+with c3: st.metric("p90 (일)", f"{overall[0.9]:.1f}")
+with c4: st.metric("p99 (일)", f"{overall[0.99]:.1f}")
+st.caption(f"※ {width:g}일 폭 히스토그램 병합 결과(오차 ≤ {width:g}일)")
+
+st.subheader("월별 p50 / p90")
+by_month = pct_table(h, "ym")
+st.plotly_chart(px.line(by_month, x="ym", y=["p50_days", "p90_days"]), use_container_width=True)
+
+key = "customer_state" if group_by == "고객 STATE" else "seller_state"
+st.subheader(f"{group_by}별 백분위")
+by_state = pct_table(h, key).sort_values("p90_days", ascending=False)
+st.dataframe(by_state, use_container_width=True, height=360)
+st.download_button("CSV 다운로드", by_state.to_csv(index=False).encode("utf-8"), "lead_time_percentiles.csv")
@@ -0,0 +1,86 @@
+# pages/05_seller_leaderboard.py
+import math
+import streamlit as st
+from db.models import q
+
+st.title("🏪 판매자 리더보드")
+
+# 정렬 지표 화이트리스트(컬럼명은 SQL에 직접 들어가므로 여기 값만 허용)
+METRICS = {
+    "GMV": "gmv",
+    "주문 수": "orders",
+    "평균 리뷰 점수": "avg_review_score",
+    "정시 배송률": "on_time_rate",
+    "운임 비율": "freight_ratio",
+}
+
+# 필터
+period = st.sidebar.radio("기간", ["전체", "연도 범위"], horizontal=True)
+metric_label = st.sidebar.selectbox("정렬 지표", list(METRICS.keys()), index=0)
+descending = st.sidebar.checkbox("내림차순", value=True)
+min_orders = st.sidebar.number_input("최소 주문 수", min_value=0, value=0, step=5)
+page_size = st.sidebar.selectbox("페이지 크기", [25, 50, 100], index=0)
+
+metric = METRICS[metric_label]
+direction = "DESC" if descending else "ASC"
+order_sql = f"{metric} {direction}, seller_id {direction}"
+params = {"min_orders": int(min_orders)}
+
+if period == "전체":
+    # seller_rollup_total: (지표, seller_id) 인덱스 순서대로 읽어 LIMIT/OFFSET 처리(정렬 없음)
+    base_sql = """
+    SELECT seller_id, seller_state, gmv, orders, avg_review_score, on_time_rate, freight_ratio
+    FROM seller_rollup_total
+    """ + ("WHERE orders >= :min_orders" if min_orders > 0 else "")
+else:
+    ym_df = q("SELECT MIN(ym) AS lo, MAX(ym) AS hi FROM seller_monthly")
+    if ym_df.empty or ym_df["lo"].isna().all():
+        st.info("판매자 롤업 테이블이 없습니다. `python scripts/etl.py --aggregates-only` 실행 후 새로고침하세요.")
+        st.stop()
+    years = [str(y) for y in range(int(str(ym_df["lo"].iloc[0])[:4]), int(str(ym_df["hi"].iloc[0])[:4]) + 1)]
+    yf, yt = st.sidebar.select_slider("구매 연도 범위", options=years, value=(years[0], years[-1]))
+    # seller_monthly(PK seller_id, ym + ym 인덱스)에서 구간만 재집계
+    base_sql = """
+    SELECT * FROM (
+      SELECT m.seller_id, t.seller_state,
+             SUM(m.gmv) AS gmv, SUM(m.orders) AS orders,
+             SUM(m.review_sum) / NULLIF(SUM(m.review_cnt), 0) AS avg_review_score,
+             CAST(SUM(m.on_time_orders) AS REAL) / NULLIF(SUM(m.delivered_orders), 0) AS on_time_rate,
+             SUM(m.freight) / NULLIF(SUM(m.gmv), 0) AS freight_ratio
+      FROM seller_monthly m
+      LEFT JOIN seller_rollup_total t USING(seller_id)
+      WHERE m.ym BETWEEN :yf || '-01' AND :yt || '-12'
+      GROUP BY m.seller_id
+    )
+    WHERE orders >= :min_orders
+    """
+    params.update({"yf": yf, "yt": yt})
+
+total_df = q(f"SELECT COUNT(*) AS n FROM ({base_sql})", params)
+total = int(total_df["n"].iloc[0]) if not total_df.empty else 0
+if total == 0:
+    st.info("조건에 맞는 판매자가 없습니다. (판매자 롤업 테이블이 없다면 `python scripts/etl.py --aggregates-only` 실행)")
+    st.stop()
+
+pages = max(1, math.ceil(total / page_size))
+page = st.number_input(f"페이지 (1 ~ {pages})", min_value=1, max_value=pages, value=1, step=1)
+
+board = q(
+    f"{base_sql} ORDER BY {order_sql} LIMIT :limit OFFSET :offset",
+    {**params, "limit": int(page_size), "offset": int((page - 1) * page_size)},
+)
+board.insert(0, "rank", range((page - 1) * page_size + 1, (page - 1) * page_size + 1 + len(board)))
+
+st.caption(f"판매자 {total:,}명 · {metric_label} {'내림차순' if descending else '오름차순'} · {page}/{pages} 페이지")
+st.dataframe(
+    board,
+    use_container_width=True,
+    height=min(40 + 35 * len(board), 900),
+    column_config={
+        "gmv": st.column_config.NumberColumn("GMV", format="%.2f"),
+        "avg_review_score": st.column_config.NumberColumn("평균 리뷰", format="%.2f"),
+        "on_time_rate": st.column_config.NumberColumn("정시 배송률", format="%.3f"),
+        "freight_ratio": st.column_config.NumberColumn("운임 비율", format="%.3f"),
+    },
+)
+st.download_button("현재 페이지 CSV", board.to_csv(index=False).encode("utf-8"), "seller_leaderboard.csv")
@@ -0,0 +1,72 @@
+# scripts/bench.py
+# SQLite vs DuckDB 분석 쿼리 벤치마크 + 결과 동일성 검증
+#   python scripts/bench.py                 # 전체 연도, 3회 반복
+#   python scripts/bench.py --yf 2017 --yt 2018 --repeat 5
+# 사전 준비: pip install duckdb pyarrow && python scripts/etl.py --parquet-only
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from db.models import run_duckdb, run_sqlite  # noqa: E402
+from db.queries import cats_sql, dashboard_where, kpi_sql, rfm_sql, rfm_where, top_sql, trend_sql  # noqa: E402
+
+WHERE_SQL = dashboard_where([])
+
+# 앱이 실제로 실행하는 SQL(db/queries.py 빌더)을 그대로 사용: app.py KPI/카테고리 수/Top 카테고리/월별 추이, pages/02 RFM
+# (Top 카테고리는 LIMIT 경계에서 동점이면 엔진별로 고르는 행이 달라 "불일치"가 날 수 있음)
+QUERIES = {
+    "kpi": kpi_sql(WHERE_SQL),
+    "category_count": cats_sql(WHERE_SQL),
+    "top_category": top_sql(WHERE_SQL, 15),
+    "monthly_trend": trend_sql(WHERE_SQL),
+    "rfm": rfm_sql(rfm_where("")),
+}
+
+def timed(fn, sql: str, params: dict, repeat: int) -> tuple[float, pd.DataFrame]:
+    """repeat회 실행 중 최소 시간(초)과 마지막 결과."""
+    best, df = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        df = fn(sql, params)
+        best = min(best, time.perf_counter() - t0)
+    return best, df
+
+def same_result(a: pd.DataFrame, b: pd.DataFrame, rtol: float = 1e-6) -> bool:
+    """엔진 간 결과 비교: 숫자는 상대오차 허용, 나머지는 문자열로 비교(행 순서 무시)."""
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    a = a.sort_values(list(a.columns)).reset_index(drop=True)
+    b = b.sort_values(list(b.columns)).reset_index(drop=True)
+    for col in a.columns:
+        x = pd.to_numeric(a[col], errors="coerce")
+        y = pd.to_numeric(b[col], errors="coerce")
+        if x.notna().any() or y.notna().any():
+            if not np.allclose(x.astype(float), y.astype(float), rtol=rtol, equal_nan=True):
+                return False
+        elif not a[col].astype(str).equals(b[col].astype(str)):
+            return False
+    return True
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--yf", default="2016", help="시작 연도")
+    ap.add_argument("--yt", default="2018", help="종료 연도")
+    ap.add_argument("--repeat", type=int, default=3, help="반복 횟수(최소 시간 보고)")
+    args = ap.parse_args()
+
+    params = {"yf": args.yf, "yt": args.yt}
+    print(f"{'query':<15}{'sqlite(s)':>11}{'duckdb(s)':>11}{'speedup':>9}  result")
+    for name, sql in QUERIES.items():
+        t_lite, df_lite = timed(run_sqlite, sql, params, args.repeat)
+        try:
+            t_duck, df_duck = timed(run_duckdb, sql, params, args.repeat)
+        except Exception as e:
+            print(f"{name:<15}{t_lite:>11.3f}{'-':>11}{'-':>9}  duckdb 실패: {e}")
+            continue
+        ok = "일치" if same_result(df_lite, df_duck) else "불일치"
+        print(f"{name:<15}{t_lite:>11.3f}{t_duck:>11.3f}{t_lite / t_duck:>8.1f}x  {ok} ({len(df_lite):,} rows)")
@@ -1,5 +1,6 @@
 # scripts/etl.py
 import argparse
+import hashlib
 import zipfile
 from pathlib import Path
 import pandas as pd
@@ -105,6 +106,10 @@ def create_indexes():
         CREATE INDEX IF NOT EXISTS idx_cust_id_state
             ON olist_customers_dataset(customer_id, customer_state);
 
+        -- 저평점 리뷰 리스트(score ASC, date DESC) 정렬을 인덱스 순서로 처리
+        CREATE INDEX IF NOT EXISTS idx_reviews_score_date
+            ON olist_order_reviews_dataset(review_score, review_creation_date DESC);
+
         ANALYZE;
         """
     )
@@ -171,12 +176,936 @@ def create_views():
     con.close()
     print("분석용 뷰(vw_*) 생성 완료.")
 
+def build_review_fts():
+    """리뷰 코멘트 전문검색(FTS5) 인덱스 + 동기화 트리거
+
+    - 외부 콘텐츠 테이블(content=olist_order_reviews_dataset)이라 텍스트를 중복 저장하지 않음
+    - unicode61 remove_diacritics 2: 포르투갈어 악센트 제거(não → nao)
+    - 적재는 if_exists="replace"로 테이블을 새로 만들므로 매번 rebuild
+    """
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH)
+    cur = con.cursor()
+    cur.executescript(
+        """
+        DROP TABLE IF EXISTS fts_reviews;
+        CREATE VIRTUAL TABLE fts_reviews USING fts5(
+            review_comment_title,
+            review_comment_message,
+            content='olist_order_reviews_dataset',
+            content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        );
+        INSERT INTO fts_reviews(fts_reviews) VALUES('rebuild');
+
+        -- 원본 테이블 변경 시 인덱스 동기화
+        CREATE TRIGGER IF NOT EXISTS trg_reviews_fts_ai
+        AFTER INSERT ON olist_order_reviews_dataset BEGIN
+          INSERT INTO fts_reviews(rowid, review_comment_title, review_comment_message)
+          VALUES (new.rowid, new.review_comment_title, new.review_comment_message);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_reviews_fts_ad
+        AFTER DELETE ON olist_order_reviews_dataset BEGIN
+          INSERT INTO fts_reviews(fts_reviews, rowid, review_comment_title, review_comment_message)
+          VALUES ('delete', old.rowid, old.review_comment_title, old.review_comment_message);
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_reviews_fts_au
+        AFTER UPDATE ON olist_order_reviews_dataset BEGIN
+          INSERT INTO fts_reviews(fts_reviews, rowid, review_comment_title, review_comment_message)
+          VALUES ('delete', old.rowid, old.review_comment_title, old.review_comment_message);
+          INSERT INTO fts_reviews(rowid, review_comment_title, review_comment_message)
+          VALUES (new.rowid, new.review_comment_title, new.review_comment_message);
+        END;
+
+        INSERT INTO fts_reviews(fts_reviews) VALUES('optimize');
+        """
+    )
+    con.commit()
+    con.close()
+    print("리뷰 전문검색 인덱스(fts_reviews) 생성 완료.")
+
+def build_review_monthly():
+    """월별 리뷰 집계 테이블(review_monthly): 평점 1~5 분포·평균·3개월 이동평균
+
+    - 첫 달~마지막 달을 빈 달 없이 생성(재귀 CTE) → 리뷰가 없는 달도 reviews=0 행으로 포함
+    - rolling_avg_3m: 해당 월 포함 최근 3개 달력월의 리뷰 수 가중 평균(3개월 모두 리뷰가 없으면 NULL)
+    """
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH)
+    cur = con.cursor()
+    cur.executescript(
+        """
+        DROP TABLE IF EXISTS review_monthly;
+        CREATE TABLE review_monthly AS
+        WITH RECURSIVE m AS (
+          SELECT
+            strftime('%Y-%m', review_creation_date) AS ym,
+            COUNT(*)                                AS reviews,
+            SUM(review_score = 1)                   AS s1,
+            SUM(review_score = 2)                   AS s2,
+            SUM(review_score = 3)                   AS s3,
+            SUM(review_score = 4)                   AS s4,
+            SUM(review_score = 5)                   AS s5,
+            SUM(review_score)                       AS score_sum
+          FROM olist_order_reviews_dataset
+          WHERE strftime('%Y-%m', review_creation_date) IS NOT NULL
+          GROUP BY 1
+        ),
+        months(ym) AS (
+          SELECT MIN(ym) FROM m HAVING MIN(ym) IS NOT NULL
+          UNION ALL
+          SELECT strftime('%Y-%m', ym || '-01', '+1 month')
+          FROM months
+          WHERE ym < (SELECT MAX(ym) FROM m)
+        ),
+        filled AS (
+          SELECT
+            months.ym,
+            COALESCE(m.reviews, 0)   AS reviews,
+            COALESCE(m.s1, 0)        AS s1,
+            COALESCE(m.s2, 0)        AS s2,
+            COALESCE(m.s3, 0)        AS s3,
+            COALESCE(m.s4, 0)        AS s4,
+            COALESCE(m.s5, 0)        AS s5,
+            COALESCE(m.score_sum, 0) AS score_sum
+          FROM months
+          LEFT JOIN m USING(ym)
+        )
+        SELECT
+          ym,
+          substr(ym, 1, 4)                         AS y,
+          reviews, s1, s2, s3, s4, s5,
+          CAST(score_sum AS REAL) / NULLIF(reviews, 0) AS avg_score,
+          CAST(SUM(score_sum) OVER w AS REAL) / NULLIF(SUM(reviews) OVER w, 0) AS rolling_avg_3m
+        FROM filled
+        WINDOW w AS (ORDER BY ym ROWS BETWEEN 2 PRECEDING AND CURRENT ROW)
+        ORDER BY ym;
+
+        CREATE UNIQUE INDEX idx_review_monthly_ym ON review_monthly(ym);
+        CREATE INDEX idx_review_monthly_y ON review_monthly(y);
+        """
+    )
+    con.commit()
+    con.close()
+    print("월별 리뷰 집계(review_monthly) 생성 완료.")
+
+def _haversine_km(lat1, lng1, lat2, lng2):
+    """구면 거리(km). numpy 배열 입력."""
+    import numpy as np
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 6371.0 * 2 * np.arcsin(np.sqrt(a))
+
+def build_geo_tables(drop_raw: bool = True):
+    """지오로케이션 압축: zip prefix별 중심좌표 테이블 + 고객/판매자 좌표 뷰 + 주문-판매자 거리
+
+    - geo_zip_prefix: prefix당 1행(평균 위경도 REAL, 최빈 city/state, 원본 포인트 수)
+    - vw_customer_geo / vw_seller_geo: geo_zip_prefix PK 조회라 조인 비용이 거의 없음
+    - order_seller_distance: 주문×판매자별 고객-판매자 거리(km), 배송거리 분석용
+    - drop_raw=True면 원본 olist_geolocation_dataset 삭제(공간 회수는 VACUUM 시점)
+    - 원본이 이미 삭제된 재실행(--aggregates-only)은 geo_zip_prefix를 유지하고 뷰·거리 테이블만 다시 계산
+    """
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH)
+    cur = con.cursor()
+    tables = {r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    has_raw = "olist_geolocation_dataset" in tables
+    if not has_raw and "geo_zip_prefix" not in tables:
+        con.close()
+        print("경고: olist_geolocation_dataset·geo_zip_prefix 없음 → 지오 테이블 생략")
+        return
+    if not has_raw:
+        print("olist_geolocation_dataset 없음(이전 실행에서 삭제) → 기존 geo_zip_prefix 사용")
+
+    if has_raw:
+        cur.executescript(
+            """
+            DROP TABLE IF EXISTS geo_zip_prefix;
+            CREATE TABLE geo_zip_prefix (
+              zip_prefix INTEGER PRIMARY KEY,
+              lat        REAL NOT NULL,
+              lng        REAL NOT NULL,
+              city       TEXT,
+              state      TEXT,
+              points     INTEGER NOT NULL
+            );
+            INSERT INTO geo_zip_prefix
+            WITH c AS (
+              SELECT geolocation_zip_code_prefix AS zip_prefix, geolocation_city AS city,
+                     geolocation_state AS state, COUNT(*) AS n
+              FROM olist_geolocation_dataset
+              GROUP BY 1, 2, 3
+            ),
+            top_city AS (
+              SELECT zip_prefix, city, state,
+                     ROW_NUMBER() OVER (PARTITION BY zip_prefix ORDER BY n DESC, city) AS rn
+              FROM c
+            )
+            SELECT g.geolocation_zip_code_prefix,
+                   AVG(g.geolocation_lat), AVG(g.geolocation_lng),
+                   t.city, t.state, COUNT(*)
+            FROM olist_geolocation_dataset g
+            JOIN top_city t ON t.zip_prefix = g.geolocation_zip_code_prefix AND t.rn = 1
+            WHERE g.geolocation_lat IS NOT NULL AND g.geolocation_lng IS NOT NULL
+            GROUP BY g.geolocation_zip_code_prefix;
+            CREATE INDEX idx_geo_prefix_state ON geo_zip_prefix(state);
+            """
+        )
+
+    cur.executescript(
+        """
+        DROP VIEW IF EXISTS vw_customer_geo;
+        CREATE VIEW vw_customer_geo AS
+        SELECT c.customer_id, c.customer_unique_id, c.customer_state,
+               c.customer_zip_code_prefix AS zip_prefix, g.lat, g.lng
+        FROM olist_customers_dataset c
+        LEFT JOIN geo_zip_prefix g ON g.zip_prefix = c.customer_zip_code_prefix;
+
+        DROP VIEW IF EXISTS vw_seller_geo;
+        CREATE VIEW vw_seller_geo AS
+        SELECT s.seller_id, s.seller_state,
+               s.seller_zip_code_prefix AS zip_prefix, g.lat, g.lng
+        FROM olist_sellers_dataset s
+        LEFT JOIN geo_zip_prefix g ON g.zip_prefix = s.seller_zip_code_prefix;
+        """
+    )
+
+    pairs = pd.read_sql_query(
+        """
+        SELECT DISTINCT i.order_id, i.seller_id,
+               c.customer_state, s.seller_state,
+               c.zip_prefix AS customer_zip_prefix, s.zip_prefix AS seller_zip_prefix,
+               c.lat AS c_lat, c.lng AS c_lng, s.lat AS s_lat, s.lng AS s_lng
+        FROM olist_order_items_dataset i
+        JOIN olist_orders_dataset o USING(order_id)
+        JOIN vw_customer_geo c ON c.customer_id = o.customer_id
+        JOIN vw_seller_geo   s ON s.seller_id = i.seller_id
+        """,
+        con,
+    )
+    pairs["distance_km"] = _haversine_km(pairs["c_lat"], pairs["c_lng"], pairs["s_lat"], pairs["s_lng"])
+    pairs = pairs.drop(columns=["c_lat", "c_lng", "s_lat", "s_lng"])
+    pairs.to_sql("order_seller_distance", con, if_exists="replace", index=False)
+    cur.executescript(
+        """
+        CREATE INDEX IF NOT EXISTS idx_osd_order ON order_seller_distance(order_id);
+        CREATE INDEX IF NOT EXISTS idx_osd_states ON order_seller_distance(customer_state, seller_state);
+        """
+    )
+
+    if drop_raw and has_raw:
+        cur.execute("DROP TABLE olist_geolocation_dataset")
+    con.commit()
+    con.close()
+    print(f"지오 압축(geo_zip_prefix) + 주문-판매자 거리(order_seller_distance) {len(pairs):,}행 생성 완료.")
+
+def _get_state(cur, key: str):
+    """etl_state: 증분 갱신 워터마크 등 ETL 메타 값 저장"""
+    cur.execute("CREATE TABLE IF NOT EXISTS etl_state (key TEXT PRIMARY KEY, value TEXT)")
+    row = cur.execute("SELECT value FROM etl_state WHERE key=?", (key,)).fetchone()
+    return row[0] if row else None
+
+def _set_state(cur, key: str, value):
+    cur.execute("CREATE TABLE IF NOT EXISTS etl_state (key TEXT PRIMARY KEY, value TEXT)")
+    cur.execute("INSERT OR REPLACE INTO etl_state(key, value) VALUES (?, ?)", (key, value))
+
+def _sig_hash(text: str) -> int:
+    """변경 감지 서명 문자열 → 64비트 정수(blake2b 8바이트). 서명 테이블을 작게 유지."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+def _register_sig_hash(con):
+    con.create_function("sig_hash", 1, _sig_hash, deterministic=True)
+
+def build_customer_cohort(full: bool = False):
+    """고객 코호트(첫 구매월 × 경과 개월) 테이블: 활성 고객 수·매출
+
+    - customer_first_purchase: customer_unique_id별 첫 구매월(cohort_ym)
+    - customer_cohort: (cohort_ym, months_since) → active_customers, revenue
+    - 증분: 주문별 서명(cohort_order_sig: 고객·구매시각·상태·결제합)을 지난 실행과 비교해
+      달라진/새로/사라진 주문의 고객만 첫 구매월을 다시 구하고, 그 고객의 이전·현재 코호트만 재계산
+      (--load 재적재로 기존 주문의 상태·결제가 바뀐 경우도 반영)
+    """
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH)
+    _register_sig_hash(con)
+    cur = con.cursor()
+    has_table = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='cohort_order_sig'"
+    ).fetchone()
+    rebuild = full or not has_table
+
+    if rebuild:
+        cur.executescript(
+            """
+            DROP TABLE IF EXISTS customer_first_purchase;
+            CREATE TABLE customer_first_purchase (
+              customer_unique_id TEXT PRIMARY KEY,
+              cohort_ym          TEXT NOT NULL
+            ) WITHOUT ROWID;
+            DROP TABLE IF EXISTS customer_cohort;
+            CREATE TABLE customer_cohort (
+              cohort_ym        TEXT NOT NULL,
+              months_since     INTEGER NOT NULL,
+              active_customers INTEGER NOT NULL,
+              revenue          REAL NOT NULL,
+              PRIMARY KEY (cohort_ym, months_since)
+            ) WITHOUT ROWID;
+            DROP TABLE IF EXISTS cohort_order_sig;
+            CREATE TABLE cohort_order_sig (
+              order_id           TEXT PRIMARY KEY,
+              customer_unique_id TEXT NOT NULL,
+              sig                INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+
+    # 전체 주문(취소/불가 포함 → 상태 변경 감지) + 고객 단위 ID + 주문 결제합 + 서명
+    cur.executescript(
+        """
+        DROP TABLE IF EXISTS temp.cohort_orders;
+        CREATE TEMP TABLE cohort_orders AS
+        WITH pay AS (
+          SELECT order_id, SUM(payment_value) AS amount
+          FROM olist_order_payments_dataset
+          GROUP BY 1
+        )
+        SELECT c.customer_unique_id,
+               o.order_id,
+               o.order_purchase_timestamp AS ts,
+               strftime('%Y-%m', o.order_purchase_timestamp) AS ym,
+               o.order_status NOT IN ('canceled', 'unavailable') AS eligible,
+               COALESCE(p.amount, 0) AS amount,
+               sig_hash(printf('%s|%s|%s|%.2f', c.customer_unique_id, o.order_purchase_timestamp,
+                               o.order_status, COALESCE(p.amount, 0))) AS sig
+        FROM olist_orders_dataset o
+        JOIN olist_customers_dataset c USING(customer_id)
+        LEFT JOIN pay p USING(order_id)
+        WHERE o.order_purchase_timestamp IS NOT NULL;
+        CREATE INDEX temp.idx_cohort_orders_cust ON cohort_orders(customer_unique_id);
+
+        DROP TABLE IF EXISTS temp.changed_customers;
+        CREATE TEMP TABLE changed_customers (customer_unique_id TEXT PRIMARY KEY);
+        DROP TABLE IF EXISTS temp.touched;
+        CREATE TEMP TABLE touched (cohort_ym TEXT PRIMARY KEY);
+        """
+    )
+    if rebuild:
+        cur.execute("INSERT INTO changed_customers SELECT DISTINCT customer_unique_id FROM cohort_orders")
+    else:
+        cur.executescript(
+            """
+            INSERT OR IGNORE INTO changed_customers
+            SELECT n.customer_unique_id
+            FROM cohort_orders n
+            LEFT JOIN cohort_order_sig s USING(order_id)
+            WHERE s.sig IS NULL OR s.sig <> n.sig;
+
+            INSERT OR IGNORE INTO changed_customers
+            SELECT s.customer_unique_id
+            FROM cohort_order_sig s
+            LEFT JOIN cohort_orders n USING(order_id)
+            WHERE n.order_id IS NULL OR n.sig <> s.sig;
+            """
+        )
+
+    changed = cur.execute("SELECT COUNT(*) FROM changed_customers").fetchone()[0]
+    if changed == 0:
+        con.close()
+        print("고객 코호트: 변경된 주문 없음 → 생략")
+        return
+
+    # 변경 고객의 이전 코호트 + 다시 구한 첫 구매월(첫 주문이 취소되면 코호트가 옮겨감)의 코호트를 재계산
+    cur.executescript(
+        """
+        INSERT OR IGNORE INTO touched
+        SELECT cohort_ym FROM customer_first_purchase
+        WHERE customer_unique_id IN (SELECT customer_unique_id FROM changed_customers);
+
+        DELETE FROM customer_first_purchase
+        WHERE customer_unique_id IN (SELECT customer_unique_id FROM changed_customers);
+        INSERT INTO customer_first_purchase(customer_unique_id, cohort_ym)
+        SELECT customer_unique_id, strftime('%Y-%m', MIN(ts))
+        FROM cohort_orders
+        WHERE eligible AND customer_unique_id IN (SELECT customer_unique_id FROM changed_customers)
+        GROUP BY customer_unique_id;
+
+        INSERT OR IGNORE INTO touched
+        SELECT cohort_ym FROM customer_first_purchase
+        WHERE customer_unique_id IN (SELECT customer_unique_id FROM changed_customers);
+
+        DELETE FROM customer_cohort WHERE cohort_ym IN (SELECT cohort_ym FROM touched);
+        INSERT INTO customer_cohort(cohort_ym, months_since, active_customers, revenue)
+        SELECT f.cohort_ym,
+               (CAST(substr(o.ym, 1, 4) AS INTEGER) * 12 + CAST(substr(o.ym, 6, 2) AS INTEGER))
+             - (CAST(substr(f.cohort_ym, 1, 4) AS INTEGER) * 12 + CAST(substr(f.cohort_ym, 6, 2) AS INTEGER))
+               AS months_since,
+               COUNT(DISTINCT o.customer_unique_id) AS active_customers,
+               SUM(o.amount)                        AS revenue
+        FROM cohort_orders o
+        JOIN customer_first_purchase f USING(customer_unique_id)
+        WHERE o.eligible AND f.cohort_ym IN (SELECT cohort_ym FROM touched)
+        GROUP BY 1, 2;
+
+        DELETE FROM cohort_order_sig
+        WHERE customer_unique_id IN (SELECT customer_unique_id FROM changed_customers);
+        INSERT OR REPLACE INTO cohort_order_sig(order_id, customer_unique_id, sig)
+        SELECT order_id, customer_unique_id, sig
+        FROM cohort_orders
+        WHERE customer_unique_id IN (SELECT customer_unique_id FROM changed_customers);
+        """
+    )
+    touched = cur.execute("SELECT COUNT(*) FROM touched").fetchone()[0]
+    con.commit()
+    con.close()
+    print(f"고객 코호트(customer_cohort) 갱신 완료: 고객 {changed:,}명 변경 → {touched}개 코호트 재계산.")
+
+LEAD_BUCKET_DAYS = 1    # 리드타임 히스토그램 구간 폭(일) → 백분위 오차 상한
+LEAD_MAX_BUCKET = 120   # 마지막 구간은 "120일 이상"(overflow)
+
+def build_lead_time_hist():
+    """배송 리드타임 히스토그램(lead_time_hist): 구매월 × 고객주 × 판매자주 × 일 단위 구간별 주문 수
+
+    SQLite엔 백분위 집계가 없으므로, 구간을 메모리에서 합쳐 p50/p90 등을 계산
+    (db.models.hist_percentiles). 오차는 구간 폭(LEAD_BUCKET_DAYS) 이내.
+    """
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH)
+    cur = con.cursor()
+    cur.executescript(
+        f"""
+        DROP TABLE IF EXISTS lead_time_hist;
+        CREATE TABLE lead_time_hist AS
+        WITH order_seller AS (
+          SELECT DISTINCT i.order_id, s.seller_state
+          FROM olist_order_items_dataset i
+          JOIN olist_sellers_dataset s USING(seller_id)
+        )
+        SELECT
+          strftime('%Y-%m', l.order_purchase_timestamp) AS ym,
+          c.customer_state,
+          os.seller_state,
+          MIN(MAX(CAST(l.lead_time_days / {LEAD_BUCKET_DAYS} AS INTEGER), 0), {LEAD_MAX_BUCKET}) AS bucket,
+          COUNT(*) AS orders
+        FROM vw_order_lead_time l
+        JOIN olist_customers_dataset c USING(customer_id)
+        JOIN order_seller os USING(order_id)
+        GROUP BY 1, 2, 3, 4;
+
+        CREATE INDEX idx_lead_hist_ym ON lead_time_hist(ym);
+        CREATE INDEX idx_lead_hist_states ON lead_time_hist(customer_state, seller_state);
+        """
+    )
+    _set_state(cur, "lead_bucket_days", LEAD_BUCKET_DAYS)
+    con.commit()
+    rows = cur.execute("SELECT COUNT(*) FROM lead_time_hist").fetchone()[0]
+    con.close()
+    print(f"리드타임 히스토그램(lead_time_hist) {rows:,}행 생성 완료.")
+
+def build_seller_rollup(full: bool = False):
+    """판매자 롤업: seller_monthly(판매자 × 구매월) + seller_rollup_total(판매자 전체 기간)
+
+    - 지표 원천: GMV(가격합)·주문 수·아이템 수·운임합·리뷰 점수합/건수·정시배송/배송완료 주문 수
+    - 정시배송: 예정일은 자정 기준 날짜라 date()끼리 비교(예정일 당일 배송 = 정시)
+    - 증분: (주문, 판매자)별 지표 서명 해시(seller_order_sig, 64비트 정수)를 지난 실행과 비교해
+      달라진/사라진 주문이 있는 판매자만 삭제 후 재집계
+    - seller_rollup_total은 지표별 인덱스로 리더보드 정렬·페이지네이션을 처리
+    """
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH)
+    _register_sig_hash(con)
+    cur = con.cursor()
+    cur.executescript(
+        """
+        DROP TABLE IF EXISTS temp.seller_orders;
+        CREATE TEMP TABLE seller_orders AS
+        WITH rv AS (
+          SELECT order_id, AVG(review_score) AS score
+          FROM olist_order_reviews_dataset
+          GROUP BY 1
+        ),
+        it AS (
+          SELECT order_id, seller_id,
+                 SUM(price) AS gmv, SUM(freight_value) AS freight, COUNT(*) AS items
+          FROM olist_order_items_dataset
+          GROUP BY 1, 2
+        )
+        SELECT it.seller_id, it.order_id,
+               strftime('%Y-%m', o.order_purchase_timestamp) AS ym,
+               it.gmv, it.freight, it.items, rv.score,
+               o.order_delivered_customer_date IS NOT NULL AS delivered,
+               o.order_delivered_customer_date IS NOT NULL
+                 AND date(o.order_delivered_customer_date) <= date(o.order_estimated_delivery_date) AS on_time,
+               sig_hash(printf('%s|%s|%s|%s|%s|%.2f|%.2f|%d|%s', o.order_status, o.order_purchase_timestamp,
+                               o.order_delivered_customer_date, o.order_estimated_delivery_date, rv.score,
+                               it.gmv, it.freight, it.items, o.customer_id)) AS sig
+        FROM it
+        JOIN olist_orders_dataset o USING(order_id)
+        LEFT JOIN rv USING(order_id)
+        WHERE o.order_purchase_timestamp IS NOT NULL;
+        CREATE INDEX temp.idx_seller_orders_seller ON seller_orders(seller_id);
+
+        DROP TABLE IF EXISTS temp.changed_sellers;
+        CREATE TEMP TABLE changed_sellers (seller_id TEXT PRIMARY KEY);
+        """
+    )
+    # 예전 형식(서명 원문 TEXT) 테이블이면 정시배송 기준도 달랐으므로 전체 재계산
+    sig_type = {r[1]: r[2] for r in cur.execute("PRAGMA table_info(seller_order_sig)").fetchall()}.get("sig")
+    if full or sig_type != "INTEGER":
+        cur.executescript(
+            """
+            DROP TABLE IF EXISTS seller_order_sig;
+            CREATE TABLE seller_order_sig (
+              order_id  TEXT NOT NULL,
+              seller_id TEXT NOT NULL,
+              sig       INTEGER NOT NULL,
+              PRIMARY KEY (order_id, seller_id)
+            ) WITHOUT ROWID;
+            DROP TABLE IF EXISTS seller_monthly;
+            CREATE TABLE seller_monthly (
+              seller_id         TEXT NOT NULL,
+              ym                TEXT NOT NULL,
+              gmv               REAL NOT NULL,
+              orders            INTEGER NOT NULL,
+              items             INTEGER NOT NULL,
+              freight           REAL NOT NULL,
+              review_sum        REAL NOT NULL,
+              review_cnt        INTEGER NOT NULL,
+              on_time_orders    INTEGER NOT NULL,
+              delivered_orders  INTEGER NOT NULL,
+              PRIMARY KEY (seller_id, ym)
+            ) WITHOUT ROWID;
+            CREATE INDEX idx_seller_monthly_ym ON seller_monthly(ym);
+            DROP TABLE IF EXISTS seller_rollup_total;
+            CREATE TABLE seller_rollup_total (
+              seller_id         TEXT PRIMARY KEY,
+              seller_state      TEXT,
+              gmv               REAL NOT NULL,
+              orders            INTEGER NOT NULL,
+              avg_review_score  REAL,
+              on_time_rate      REAL,
+              freight_ratio     REAL
+            );
+            CREATE INDEX idx_seller_total_gmv     ON seller_rollup_total(gmv, seller_id);
+            CREATE INDEX idx_seller_total_orders  ON seller_rollup_total(orders, seller_id);
+            CREATE INDEX idx_seller_total_review  ON seller_rollup_total(avg_review_score, seller_id);
+            CREATE INDEX idx_seller_total_ontime  ON seller_rollup_total(on_time_rate, seller_id);
+            CREATE INDEX idx_seller_total_freight ON seller_rollup_total(freight_ratio, seller_id);
+            INSERT INTO changed_sellers SELECT DISTINCT seller_id FROM seller_orders;
+            """
+        )
+    else:
+        cur.executescript(
+            """
+            INSERT OR IGNORE INTO changed_sellers
+            SELECT n.seller_id
+            FROM seller_orders n
+            LEFT JOIN seller_order_sig s USING(order_id, seller_id)
+            WHERE s.sig IS NULL OR s.sig <> n.sig;
+
+            INSERT OR IGNORE INTO changed_sellers
+            SELECT s.seller_id
+            FROM seller_order_sig s
+            LEFT JOIN seller_orders n USING(order_id, seller_id)
+            WHERE n.order_id IS NULL;
+            """
+        )
+
+    changed = cur.execute("SELECT COUNT(*) FROM changed_sellers").fetchone()[0]
+    if changed == 0:
+        con.close()
+        print("판매자 롤업: 변경된 주문 없음 → 생략")
+        return
+
+    cur.executescript(
+        """
+        DELETE FROM seller_order_sig    WHERE seller_id IN (SELECT seller_id FROM changed_sellers);
+        DELETE FROM seller_monthly      WHERE seller_id IN (SELECT seller_id FROM changed_sellers);
+        DELETE FROM seller_rollup_total WHERE seller_id IN (SELECT seller_id FROM changed_sellers);
+
+        INSERT INTO seller_order_sig(order_id, seller_id, sig)
+        SELECT order_id, seller_id, sig
+        FROM seller_orders
+        WHERE seller_id IN (SELECT seller_id FROM changed_sellers);
+
+        INSERT INTO seller_monthly
+        SELECT seller_id, ym,
+               SUM(gmv), COUNT(*), SUM(items), SUM(freight),
+               COALESCE(SUM(score), 0), COUNT(score),
+               SUM(on_time), SUM(delivered)
+        FROM seller_orders
+        WHERE seller_id IN (SELECT seller_id FROM changed_sellers)
+        GROUP BY 1, 2;
+
+        INSERT INTO seller_rollup_total
+        SELECT m.seller_id, s.seller_state,
+               SUM(m.gmv), SUM(m.orders),
+               SUM(m.review_sum) / NULLIF(SUM(m.review_cnt), 0),
+               CAST(SUM(m.on_time_orders) AS REAL) / NULLIF(SUM(m.delivered_orders), 0),
+               SUM(m.freight) / NULLIF(SUM(m.gmv), 0)
+        FROM seller_monthly m
+        LEFT JOIN olist_sellers_dataset s USING(seller_id)
+        WHERE m.seller_id IN (SELECT seller_id FROM changed_sellers)
+        GROUP BY m.seller_id;
+        """
+    )
+    con.commit()
+    con.close()
+    print(f"판매자 롤업(seller_monthly/seller_rollup_total) 갱신 완료: {changed:,}명 재집계.")
+
+# 연도 파티션은 선택 기능: 팩트 테이블이 한 벌 더 생기므로(파일 크기 ≈ 2배) OLIST_YEAR_PARTITIONS=1일 때만 생성
+YEAR_PARTITIONS = os.getenv("OLIST_YEAR_PARTITIONS", "0") == "1"
+
+# 연도 파티션 대상: 원본 테이블 → (원천 FROM, 파티션 연도식, 복사할 별칭, 인덱스 컬럼)
+# items/payments는 소속 주문의 구매 연도로 나눔(대시보드 필터가 o.order_purchase_timestamp 기준)
+PARTITION_SPECS = {
+    "olist_orders_dataset": (
+        "olist_orders_dataset o",
+        "strftime('%Y', o.order_purchase_timestamp)", "o",
+        ["order_id", "order_purchase_timestamp", "customer_id"],
+    ),
+    "olist_order_items_dataset": (
+        "olist_order_items_dataset i JOIN olist_orders_dataset o USING(order_id)",
+        "strftime('%Y', o.order_purchase_timestamp)", "i",
+        ["order_id", "product_id"],
+    ),
+    "olist_order_payments_dataset": (
+        "olist_order_payments_dataset p JOIN olist_orders_dataset o USING(order_id)",
+        "strftime('%Y', o.order_purchase_timestamp)", "p",
+        ["order_id"],
+    ),
+    "olist_order_reviews_dataset": (
+        "olist_order_reviews_dataset r",
+        "strftime('%Y', r.review_creation_date)", "r",
+        ["review_score, review_creation_date DESC"],
+    ),
+}
+
+def _existing_partitions(cur, table: str) -> set[str]:
+    return {
+        name[len(table) + 2:]
+        for (name,) in cur.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name GLOB ?", (f"{table}_y[0-9][0-9][0-9][0-9]",)
+        ).fetchall()
+    }
+
+def _partition_matches(cur, part: str, select_sql: str, ncols: int) -> bool:
+    """파티션이 원천 슬라이스와 행 단위로 같은지(모든 컬럼·중복 행 수까지) 비교.
+    (행, 개수) 묶음의 원천 EXCEPT 파티션이 비어 있고 전체 건수가 같으면 동일."""
+    n_src = cur.execute(f"SELECT COUNT(*) FROM ({select_sql})").fetchone()[0]
+    n_part = cur.execute(f"SELECT COUNT(*) FROM {part}").fetchone()[0]
+    if n_src != n_part:
+        return False
+    group = ", ".join(str(i) for i in range(1, ncols + 1))
+    diff = cur.execute(
+        f"""
+        SELECT EXISTS (
+          SELECT *, COUNT(*) FROM ({select_sql}) GROUP BY {group}
+          EXCEPT
+          SELECT *, COUNT(*) FROM {part} GROUP BY {group}
+        )
+        """
+    ).fetchone()[0]
+    return not diff
+
+def drop_year_partitions():
+    """연도 파티션 전부 삭제(파티션 비활성화 시 중복 저장 제거 → 앱은 원본 테이블 사용)."""
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH)
+    cur = con.cursor()
+    dropped = 0
+    for table in PARTITION_SPECS:
+        for y in _existing_partitions(cur, table):
+            cur.execute(f"DROP TABLE {table}_y{y}")
+            dropped += 1
+    con.commit()
+    con.close()
+    if dropped:
+        print(f"연도 파티션 {dropped}개 삭제(OLIST_YEAR_PARTITIONS 비활성).")
+
+def build_year_partitions(full: bool = False):
+    """팩트 테이블 연도 파티션(<table>_yYYYY) 생성 — db.models.prune_partitions가 쿼리를 재작성해 사용
+
+    - 연도별로 원천 슬라이스와 기존 파티션을 전체 행 비교, 달라진 연도만 다시 씀 → 지난 연도 파티션은 그대로
+    - 원본 테이블은 FTS·뷰·다른 집계의 원천이므로 유지
+    """
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH)
+    cur = con.cursor()
+    cur.execute("CREATE TABLE IF NOT EXISTS etl_state (key TEXT PRIMARY KEY, value TEXT)")
+    cur.execute("DELETE FROM etl_state WHERE key GLOB 'partition:*'")  # 이전 버전의 서명 값 정리
+    written = skipped = 0
+    for table, (src, year_expr, alias, idx_cols) in PARTITION_SPECS.items():
+        ncols = len(cur.execute(f"PRAGMA table_info({table})").fetchall())
+        years = [y for (y,) in cur.execute(
+            f"SELECT DISTINCT {year_expr} FROM {src} WHERE {year_expr} IS NOT NULL"
+        ).fetchall() if y.isdigit()]
+        existing = _existing_partitions(cur, table)
+        for y in existing - set(years):
+            cur.execute(f"DROP TABLE {table}_y{y}")
+
+        for y in sorted(years):
+            part = f"{table}_y{y}"
+            select_sql = f"SELECT {alias}.* FROM {src} WHERE {year_expr} = '{y}'"
+            if not full and y in existing and _partition_matches(cur, part, select_sql, ncols):
+                skipped += 1
+                continue
+            cur.execute(f"DROP TABLE IF EXISTS {part}")
+            cur.execute(f"CREATE TABLE {part} AS {select_sql}")
+            for i, cols in enumerate(idx_cols):
+                cur.execute(f"CREATE INDEX idx_{part}_{i} ON {part}({cols})")
+            written += 1
+    con.commit()
+    con.close()
+    print(f"연도 파티션 갱신 완료: {written}개 작성, {skipped}개 변경 없음(유지).")
+
+# 날짜/시각 컬럼 판별(컬럼명 접미사): Parquet TIMESTAMP 변환, dim_metadata 연도 목록에 사용
+TS_SUFFIXES = ("timestamp", "_date", "_at")
+
+PARQUET_DIR = DATA_DIR / "parquet"
+PARQUET_TABLES = [
+    "olist_customers_dataset",
+    "olist_orders_dataset",
+    "olist_order_items_dataset",
+    "olist_order_payments_dataset",
+    "olist_order_reviews_dataset",
+    "olist_products_dataset",
+    "olist_sellers_dataset",
+    "product_category_name_translation",
+]
+
+# Parquet 사본이 어느 데이터 버전(etl_state.data_version)에서 내보낸 것인지 기록하는 파일
+PARQUET_VERSION_FILE = PARQUET_DIR / "data_version"
+
+def bump_data_version() -> str:
+    """데이터 버전(etl_state.data_version)을 새 값으로 갱신: DB를 바꾼 ETL 실행마다 호출.
+    앱은 이 값을 파티션 목록·DuckDB 연결 캐시 키와 Parquet 사본 신선도 판단에 사용
+    (파일 수정 시각은 읽기 전용 연결만 열어도 -wal 파일이 생겨 바뀌므로 쓰지 않음)."""
+    import sqlite3
+    import time
+    version = str(time.time_ns())
+    con = sqlite3.connect(SQLITE_PATH)
+    cur = con.cursor()
+    _set_state(cur, "data_version", version)
+    con.commit()
+    con.close()
+    return version
+
+def export_parquet():
+    """분석 엔진(DuckDB)용 Parquet 내보내기: data/parquet/<table>.parquet
+
+    - 날짜/시각 컬럼(TS_SUFFIXES)은 TIMESTAMP로 저장 → DuckDB에서 바로 strftime 가능
+    - SQLite가 기록 시스템이고, Parquet은 매 ETL마다 덮어쓰는 읽기 전용 사본
+    - 내보낸 시점의 data_version을 PARQUET_VERSION_FILE에 기록 → 앱은 버전이 같을 때만 Parquet 사용
+    """
+    import sqlite3
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("경고: pyarrow 없음 → Parquet 내보내기 생략")
+        return
+    PARQUET_DIR.mkdir(parents=True, exist_ok=True)
+    PARQUET_VERSION_FILE.unlink(missing_ok=True)  # 내보내는 도중(일부만 새 파일)엔 사본을 쓰지 않도록
+    con = sqlite3.connect(SQLITE_PATH)
+    version = _get_state(con.cursor(), "data_version")
+    con.commit()
+    version = version or bump_data_version()
+    for table in PARQUET_TABLES:
+        df = pd.read_sql_query(f"SELECT * FROM {table}", con)
+        for col in df.columns:
+            if col.endswith(TS_SUFFIXES):
+                df[col] = pd.to_datetime(df[col], errors="coerce")
+        df.to_parquet(PARQUET_DIR / f"{table}.parquet", index=False)
+        print(f"{table}: {len(df):,} rows → parquet")
+    con.close()
+    PARQUET_VERSION_FILE.write_text(version, encoding="utf-8")
+    print(f"Parquet 내보내기 완료 → {PARQUET_DIR}")
+
+def build_dim_metadata():
+    """필터 옵션용 소형 메타데이터 테이블(dim_metadata): 앱·페이지가 매 실행 DISTINCT 스캔하지 않도록 ETL에서 한 번 계산
+
+    - kind='year'      : name='<table>.<날짜 컬럼>', value=연도, n=행 수
+    - kind='state'     : name='customer_state' | 'seller_state', value=STATE, n=고객/판매자 수
+    - kind='category'  : name='product_category_name', value=카테고리, label=영문 번역, n=상품 수
+    - kind='row_count' : name=테이블명, value='', n=행 수
+    """
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH)
+    cur = con.cursor()
+    existing = {r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    cur.executescript(
+        """
+        DROP TABLE IF EXISTS dim_metadata;
+        CREATE TABLE dim_metadata (
+          kind  TEXT NOT NULL,
+          name  TEXT NOT NULL,
+          value TEXT NOT NULL,
+          label TEXT,
+          n     INTEGER,
+          PRIMARY KEY (kind, name, value)
+        ) WITHOUT ROWID;
+        """
+    )
+
+    for table in (n.replace(".csv", "") for n in CSV_FILES):
+        if table not in existing:
+            continue
+        cur.execute(f"INSERT INTO dim_metadata SELECT 'row_count', ?, '', NULL, COUNT(*) FROM {table}", (table,))
+        for col in (r[1] for r in cur.execute(f"PRAGMA table_info({table})").fetchall()):
+            if col.endswith(TS_SUFFIXES):
+                cur.execute(
+                    f"""
+                    INSERT INTO dim_metadata
+                    SELECT 'year', ?, strftime('%Y', {col}) AS y, NULL, COUNT(*)
+                    FROM {table}
+                    WHERE strftime('%Y', {col}) IS NOT NULL
+                    GROUP BY y
+                    """,
+                    (f"{table}.{col}",),
+                )
+
+    for table, col in (("olist_customers_dataset", "customer_state"), ("olist_sellers_dataset", "seller_state")):
+        if table in existing:
+            cur.execute(
+                f"""
+                INSERT INTO dim_metadata
+                SELECT 'state', '{col}', {col}, NULL, COUNT(*)
+                FROM {table}
+                WHERE {col} IS NOT NULL
+                GROUP BY {col}
+                """
+            )
+
+    if "olist_products_dataset" in existing:
+        has_tr = "product_category_name_translation" in existing
+        label = "MAX(t.product_category_name_english)" if has_tr else "NULL"
+        join = "LEFT JOIN product_category_name_translation t USING(product_category_name)" if has_tr else ""
+        cur.execute(
+            f"""
+            INSERT INTO dim_metadata
+            SELECT 'category', 'product_category_name', p.product_category_name, {label}, COUNT(*)
+            FROM olist_products_dataset p
+            {join}
+            WHERE p.product_category_name IS NOT NULL
+            GROUP BY p.product_category_name
+            """
+        )
+
+    con.commit()
+    n = cur.execute("SELECT COUNT(*) FROM dim_metadata").fetchone()[0]
+    con.close()
+    print(f"필터 메타데이터(dim_metadata) {n:,}행 생성 완료.")
+
+def build_aggregates(full: bool = False):
+    """사전 집계/파생 테이블 재생성(증분 지원 테이블은 full=True일 때만 전체 재계산)"""
+    build_review_monthly()
+    build_geo_tables()
+    build_customer_cohort(full=full)
+    build_lead_time_hist()
+    build_seller_rollup(full=full)
+    if YEAR_PARTITIONS:
+        build_year_partitions(full=full)
+    else:
+        drop_year_partitions()
+    build_dim_metadata()
+
+# 읽기 위주(대용량 GROUP BY 스캔) 파일 → 기본 4KB보다 큰 페이지로 I/O 횟수·B-tree 깊이 감소
+DB_PAGE_SIZE = 8192
+
+def maintain_db(page_size: int = DB_PAGE_SIZE):
+    """적재 후 파일 정리: page_size 적용 + VACUUM(빈 페이지·단편화 제거) → ANALYZE/optimize → WAL 체크포인트(TRUNCATE)
+    마지막에 dbstat 기반 테이블/인덱스별 크기 리포트 출력."""
+    import sqlite3
+    con = sqlite3.connect(SQLITE_PATH, isolation_level=None)
+    cur = con.cursor()
+    before = cur.execute("PRAGMA page_count").fetchone()[0] * cur.execute("PRAGMA page_size").fetchone()[0]
+    freelist = cur.execute("PRAGMA freelist_count").fetchone()[0]
+
+    # page_size는 WAL 모드에서 바뀌지 않음 → 잠시 DELETE 모드로 VACUUM 후 WAL 복귀
+    cur.executescript(
+        f"""
+        PRAGMA journal_mode=DELETE;
+        PRAGMA page_size={int(page_size)};
+        VACUUM;
+        PRAGMA journal_mode=WAL;
+        """
+    )
+
+    # 통계: STAT4(컴파일 옵션)가 있으면 ANALYZE가 sqlite_stat4 표본까지 수집 → 범위 조건 선택도 추정 개선
+    stat4 = any("ENABLE_STAT4" in r[0] for r in cur.execute("PRAGMA compile_options"))
+    cur.executescript(
+        """
+        PRAGMA analysis_limit=0;
+        ANALYZE;
+        PRAGMA optimize;
+        PRAGMA wal_checkpoint(TRUNCATE);
+        """
+    )
+    after = cur.execute("PRAGMA page_count").fetchone()[0] * cur.execute("PRAGMA page_size").fetchone()[0]
+    print(f"DB 정리 완료: {before / 2**20:,.1f} MB → {after / 2**20:,.1f} MB "
+          f"(빈 페이지 {freelist:,}개 회수, page_size={page_size}, stat4={'on' if stat4 else 'off'})")
+
+    # 크기 리포트(dbstat 가상 테이블은 SQLITE_ENABLE_DBSTAT_VTAB 빌드에서만 사용 가능)
+    try:
+        rows = cur.execute(
+            """
+            SELECT s.name,
+                   COALESCE(m.type, 'internal') AS type,
+                   COALESCE(m.tbl_name, s.name) AS tbl,
+                   COUNT(*) AS pages,
+                   SUM(s.pgsize) AS bytes,
+                   SUM(s.unused) AS unused
+            FROM dbstat s
+            LEFT JOIN sqlite_schema m ON m.name = s.name
+            GROUP BY s.name
+            ORDER BY SUM(SUM(s.pgsize)) OVER (PARTITION BY COALESCE(m.tbl_name, s.name)) DESC,
+                     tbl, type = 'index', bytes DESC
+            """
+        ).fetchall()
+    except sqlite3.OperationalError:
+        print("dbstat 미지원 SQLite 빌드 → 크기 리포트 생략")
+        con.close()
+        return
+    print(f"{'name':<48}{'type':<9}{'pages':>9}{'MB':>10}{'fill%':>7}")
+    for name, typ, tbl, pages, nbytes, unused in rows:
+        label = name if typ != "index" else f"  └ {name}"
+        fill = 100 * (1 - unused / nbytes) if nbytes else 0
+        print(f"{label:<48}{typ:<9}{pages:>9,}{nbytes / 2**20:>10.2f}{fill:>6.0f}%")
+    print(f"{'합계':<46}{'':<9}{sum(r[3] for r in rows):>9,}{sum(r[4] for r in rows) / 2**20:>10.2f}")
+    con.close()
+
+def prewarm_cache():
+    """캐시 예열 준비: 쿼리 로그(data/query_log.jsonl)의 인기 필터 조합을 etl_state(prewarm_filters)에 기록하고,
+    기본·인기 조합 쿼리를 한 번씩 실행해 새 DB 파일을 OS 페이지 캐시에 올림.
+    Streamlit 결과 캐시는 앱 프로세스 메모리라 여기서 채울 수 없음 → 앱 부팅 시 db.warmup.start_prewarm이 같은 조합으로 채움."""
+    import sqlite3
+    import sys
+    sys.path.insert(0, str(BASE))
+    from db.warmup import PAGES, logged_popular, plain_q, prewarm, stored_popular
+
+    popular = stored_popular()
+    for page in PAGES:
+        popular[page] = logged_popular(page) or popular.get(page, [])
+    con = sqlite3.connect(SQLITE_PATH)
+    cur = con.cursor()
+    _set_state(cur, "prewarm_filters", json.dumps(popular, ensure_ascii=False))
+    con.commit()
+    con.close()
+
+    ok, failed, sec = prewarm(plain_q, plain_q)
+    print(f"캐시 예열: 인기 조합 {sum(map(len, popular.values()))}개 기록, 쿼리 {ok}개 실행({failed}개 실패, {sec:.1f}s).")
+
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
     ap.add_argument("--download", action="store_true", help="Kaggle에서 데이터 다운로드")
     ap.add_argument("--load", action="store_true", help="CSV를 SQLite로 적재")
     ap.add_argument("--indexes-only", action="store_true", help="인덱스만 생성")
     ap.add_argument("--views-only", action="store_true", help="분석용 뷰만 생성")
+    ap.add_argument("--fts-only", action="store_true", help="리뷰 전문검색 인덱스만 재생성")
+    ap.add_argument("--aggregates-only", action="store_true", help="사전 집계 테이블만 재생성")
+    ap.add_argument("--parquet-only", action="store_true", help="DuckDB용 Parquet 사본만 내보내기")
+    ap.add_argument("--maintain", action="store_true", help="VACUUM·ANALYZE·WAL 정리 + 크기 리포트")
+    ap.add_argument("--prewarm", action="store_true", help="인기 필터 조합 기록 + 예열 쿼리 실행")
+    ap.add_argument("--full-refresh", action="store_true", help="증분 집계(코호트·판매자 롤업)도 전체 재계산")
     args = ap.parse_args()
 
     # 실행부: (정의보다 항상 아래에 위치)
@@ -186,7 +1115,29 @@ if __name__ == "__main__":
         load_to_sqlite()
         create_indexes()
         create_views()
+        build_review_fts()
+        build_aggregates(full=args.full_refresh)
+        maintain_db()
+        prewarm_cache()
     if args.indexes_only:
         create_indexes()
     if args.views_only:
         create_views()
+    if args.fts_only:
+        build_review_fts()
+    if args.aggregates_only:
+        build_aggregates(full=args.full_refresh)
+    if args.maintain:
+        maintain_db()
+    if args.prewarm:
+        prewarm_cache()
+
+    # DB를 바꾼 실행이면 데이터 버전 갱신 → Parquet 사본은 모든 단계 뒤 맨 마지막에 갱신
+    # (앱은 data_version이 다른 Parquet을 건너뛰므로, 이미 내보낸 적이 있으면 항상 다시 씀)
+    db_changed = any([args.load, args.indexes_only, args.views_only, args.fts_only,
+                      args.aggregates_only, args.maintain, args.prewarm])
+    if db_changed:
+        bump_data_version()
+    exported_before = PARQUET_DIR.exists() and any(PARQUET_DIR.glob("*.parquet"))
+    if args.parquet_only or (db_changed and (os.getenv("OLIST_ANALYTICS_ENGINE") == "duckdb" or exported_before)):
+        export_parquet()
@@ -0,0 +1,86 @@
+# viz/charts.py
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+# 이 개수를 넘으면 SVG 대신 WebGL(scattergl)로 렌더링하고, 포인트 수를 서버에서 줄임
+WEBGL_THRESHOLD = 2000
+MAX_POINTS = 5000
+
+def stratified_sample(df: pd.DataFrame, by: str, n: int, random_state: int = 42) -> pd.DataFrame:
+    """그룹(세그먼트) 비율을 유지하는 층화 샘플링.
+    작은 그룹도 사라지지 않도록 그룹당 최소 할당량을 보장(합계는 n을 약간 넘을 수 있음)."""
+    if len(df) <= n:
+        return df
+    counts = df[by].value_counts()
+    floor = max(1, n // (len(counts) * 10))
+    alloc = (counts / counts.sum() * n).round().astype(int).clip(lower=floor)
+    alloc = np.minimum(alloc, counts)
+    parts = [
+        g.sample(int(alloc[key]), random_state=random_state)
+        for key, g in df.groupby(by, observed=True, sort=False)
+    ]
+    return pd.concat(parts)
+
+def bin_points(df: pd.DataFrame, x: str, y: str, color: str | None = None, bins: int = 60) -> pd.DataFrame:
+    """x·y를 2D 격자로 묶어 (color, 격자)별 대표점·개수로 집계. 출력 행 수 ≤ 그룹수 × bins²."""
+    df = df.dropna(subset=[x, y])
+    xs = pd.to_numeric(df[x], errors="coerce")
+    ys = pd.to_numeric(df[y], errors="coerce")
+    x_edges = np.histogram_bin_edges(xs.dropna(), bins=bins)
+    y_edges = np.histogram_bin_edges(ys.dropna(), bins=bins)
+    keys = {
+        "_bx": np.clip(np.digitize(xs, x_edges) - 1, 0, bins - 1),
+        "_by": np.clip(np.digitize(ys, y_edges) - 1, 0, bins - 1),
+    }
+    if color:
+        keys[color] = df[color].to_numpy()
+    g = pd.DataFrame(keys).assign(**{x: xs.to_numpy(), y: ys.to_numpy()})
+    out = (
+        g.groupby(list(keys), observed=True)
+         .agg(**{x: (x, "mean"), y: (y, "mean"), "points": (x, "size")})
+         .reset_index()
+         .drop(columns=["_bx", "_by"])
+    )
+    return out
+
+def scatter(
+    df: pd.DataFrame,
+    x: str,
+    y: str,
+    color: str | None = None,
+    size: str | None = None,
+    hover_data: list[str] | None = None,
+    mode: str = "sample",
+    max_points: int = MAX_POINTS,
+    **kwargs,
+):
+    """대용량 산점도. 포인트가 WEBGL_THRESHOLD 이하면 px.scatter 그대로,
+    초과하면 WebGL로 그리고 mode에 따라 브라우저 전송량을 제한.
+    - mode="sample": color 기준 층화 샘플링(세그먼트 형태 유지, hover 유지)
+    - mode="density": 2D 격자 집계(버블 크기=포인트 수, hover는 집계값만)
+    """
+    n = len(df)
+    if n <= WEBGL_THRESHOLD:
+        return px.scatter(df, x=x, y=y, color=color, size=size, hover_data=hover_data, **kwargs)
+
+    if mode == "density":
+        agg = bin_points(df, x, y, color=color)
+        fig = px.scatter(agg, x=x, y=y, color=color, size="points", hover_data=["points"],
+                         render_mode="webgl", **kwargs)
+        label = f"{n:,}점 → {len(agg):,}개 격자 집계"
+    else:
+        view = stratified_sample(df, color, max_points) if color else df.sample(min(n, max_points), random_state=42)
+        fig = px.scatter(view, x=x, y=y, color=color, size=size, hover_data=hover_data,
+                         render_mode="webgl", **kwargs)
+        label = f"{n:,}점 중 {len(view):,}점 층화 샘플" if len(view) < n else f"{n:,}점"
+    fig.update_layout(title_text=label, title_font_size=12)
+    return fig
+
+def timeseries(df: pd.DataFrame, x: str, y: str, kind: str = "line"):
+    """월별 추이용 line/bar. 포인트가 많으면 WebGL."""
+    if kind == "bar":
+        return px.bar(df, x=x, y=y)
+    render_mode = "webgl" if len(df) > WEBGL_THRESHOLD else "auto"
+    return px.line(df, x=x, y=y, render_mode=render_mode)